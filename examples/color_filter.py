@@ -47,7 +47,7 @@ print(f"✔ Simulation initiated in {time.perf_counter() - step_time:.2f}s.")
 
 step_time = time.perf_counter()
 
-rays = simulate(initial_rays, systems, playground, dx = dx)
+rays = simulate(initial_rays, systems, playground, dx = dx, sequence = "auto")	# Filters train traced by batches
 
 print(f"✔ Simulation completed in {time.perf_counter() - step_time:.2f}s.")
 print(f"   {sum([len(r.positions) for r in rays])/(time.perf_counter() - step_time):.2f} step/s")
@@ -49,7 +49,13 @@ print(f"✔ Simulation initiated in {time.perf_counter() - step_time:.2f}s.")
 
 step_time = time.perf_counter()
 
-rays = simulate(rays, systems, playground, dx = dx, max_rays = 20)
+rays = simulate(rays, systems, playground, engine = 'event', horizon = 1e-12, max_rays = 100)	# Event-driven, 1ps horizon
+
+output = [r for r in rays if r.path and r.path[-1].system == 4]	# Pulses reaching the screen
+print("--- Output pulses ---")
+for r in output:
+	print(f"   t = {r.time*1e12:.3f}ps, I = {r.intensity:.4f}")
+print("---------------------")
 
 # ---------------------------------------------------------------------------- #
 #                                Show the scene                                #
@@ -4,8 +4,9 @@ import numpy as np
 import time
 
 # Project modules
-from raysim import simulate, display
-from raysim.systems import Mirror
+from raysim import simulate
+from raysim.interactive import Session
+from raysim.systems import Mirror, Detector
 from raysim.photon import Photon
 
 start_time = time.perf_counter()
@@ -26,11 +27,17 @@ initial_rays = [										# Set rays
 	Photon(source, dir=.1)
 ]
 
-systems = [												# Set systems
-	Mirror((0, 0), 10, rot = 3*np.pi/4, reflexion = 0.5),
-	Mirror((5+e, 0), 10, 0),
-	Mirror((0, 5), 10, np.pi/2)
-]
+def scene(e):
+	"""Build the interferometer for a path difference e."""
+	systems = [											# Set systems
+		Mirror((0, 0), 10, rot = 3*np.pi/4, reflexion = 0.5),
+		Mirror((5+e, 0), 10, 0),
+		Mirror((0, 5), 10, np.pi/2),
+		Detector((0, -7), 10, np.pi/2)
+	]
+	return initial_rays, systems
+
+systems = scene(e)[1]
 
 print("--- Michelson Interferometer ---")
 print("Source position:", source)
@@ -55,30 +62,37 @@ rays = simulate(initial_rays, systems, playground, dx = dx)
 
 step_time = time.perf_counter()
 
-fig, ax = plt.subplots(num="Michelson Interferometer")	# Create figure and axis
+es = np.linspace(0, 5, 5000)							# Fringes over the slider range
+fringes = systems[3].fringes(1, es - e, systems)		# Single batched call
+
+fig, (ax, fringe_ax) = plt.subplots(1, 2, num="Michelson Interferometer",
+	gridspec_kw={'width_ratios': [2, 1]})				# Create figure and axes
 
-display(rays, systems, playground,
-		sources=source, ax=ax, title="Michelson Interferometer")	# Display the scene
+def annotate(rays, systems, done = True):
+	"""Move the path difference annotations."""
+	e_label.set_position((5 + (systems[1].pos[0] - 5)/2 - .3, .5))
+	e_arrow.xyann = (systems[1].pos[0]+.1, 0)
+	e_line.set_xdata([systems[1].pos[0] - 5]*2)		# Move the fringe marker
 
-ax.annotate("e", xy=(5 + (systems[1].pos[0] - 5)/2 - .3, .5))		# Annotate the path difference
-ax.annotate("", xy=(4.9, 0),
-			xytext=(systems[1].pos[0]+.1, 0), arrowprops=dict(arrowstyle="<->"))						# Annotate the path difference
+fringe_ax.plot(es, fringes, color='black', linewidth=.5)	# Plot fringes
+e_line = fringe_ax.axvline(e, color='red')
+fringe_ax.set_xlabel("e")
+fringe_ax.set_ylabel("Intensity")
+fringe_ax.set_title("Fringes")
+
+session = Session(scene, playground, ax, sources=source,
+	title="Michelson Interferometer", on_result=annotate, dx=dx)	# Resimulate in background
+
+e_label = ax.annotate("e", xy=(0, 0))					# Annotate the path difference
+e_arrow = ax.annotate("", xy=(4.9, 0), xytext=(0, 0), arrowprops=dict(arrowstyle="<->"))
+annotate(rays, systems)
+session.view.update(rays, systems)						# Display the scene
 
 fig.subplots_adjust(bottom=0.25)
 e_ax = fig.add_axes([0.18, 0.1, 0.65, 0.03])
-e_slider = Slider(e_ax, 'e', 0, 5, valinit=2)
-
-def update(val):
-	e = e_slider.val
-	systems[1].move((5+e, 0))
-	rays = simulate(initial_rays, systems, playground, dx = dx, resimulate=True)
-	display(rays, systems, playground,
-		 sources=source, ax=ax, title="Michelson Interferometer")
-	ax.annotate("e", xy=(5 + (systems[1].pos[0] - 5)/2 - .3, .5))	# Annotate the path difference
-	ax.annotate("", xy=(4.9, 0),
-			 xytext=(systems[1].pos[0]+.1, 0), arrowprops=dict(arrowstyle="<->"))						# Annotate the path difference
-
-e_slider.on_changed(update)
+e_slider = Slider(e_ax, 'e', 0, 5, valinit=e)
+
+e_slider.on_changed(session.request)
 
 print(f"✔ Simulation plotted in {time.perf_counter() - step_time:.2f}s.")
 print(f"   ✔ {len(rays)} rays plotted.")
@@ -0,0 +1,69 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import time
+
+# Project modules
+from raysim import *
+from raysim.systems import Interface, Screen
+from raysim.photon import Photon
+import raysim.optics as opt
+
+start_time = time.perf_counter()
+
+# ---------------------------------------------------------------------------- #
+#                            Initiate the simulation                           #
+# ---------------------------------------------------------------------------- #
+
+step_time = time.perf_counter()
+
+playground = (-10, -10, 15, 10)							# Playground limits
+dx = .01												# Step size
+
+source = (-10, -2)										# Source position
+initial_rays = [										# Set rays
+	Photon(source, dir=.2, wavelength=400 + 25*i)
+	for i in range(13)
+]
+
+side = 3*np.sqrt(3)										# Equilateral prism side
+systems = [												# Set systems, normals pointing inside the glass
+	Interface((-1.3, .75), side, rot=-np.pi/6, n2=opt.BK7, fresnel=False),
+	Interface((1.3, .75), side, rot=7*np.pi/6, n2=opt.BK7, fresnel=False),
+	Interface((0, -1.5), side, rot=np.pi/2, n2=opt.BK7, fresnel=False),
+	Screen((12, 0), 20)
+]
+
+print("--- Dispersion by a prism ---")
+print("Source position:", source)
+print(f"BK7 index: {opt.BK7(400):.4f} (400nm) - {opt.BK7(700):.4f} (700nm)")
+print("-----------------------------")
+
+print(f"✔ Simulation initiated in {time.perf_counter() - step_time:.2f}s.")
+
+# ---------------------------------------------------------------------------- #
+#                               Simulate the rays                              #
+# ---------------------------------------------------------------------------- #
+
+step_time = time.perf_counter()
+
+rays = simulate(initial_rays, systems, playground, dx = dx)
+
+# ---------------------------------------------------------------------------- #
+#                                Show the scene                                #
+# ---------------------------------------------------------------------------- #
+
+step_time = time.perf_counter()
+
+display(rays, systems, playground, source, title="Prism")	# Display simulation
+
+print(f"✔ Simulation plotted in {time.perf_counter() - step_time:.2f}s.")
+print(f"   ✔ {len(rays)} rays plotted.")
+print(f"   ✔ {len(systems)} systems plotted.")
+
+# ---------------------------------------------------------------------------- #
+#                             End of the simulation                            #
+# ---------------------------------------------------------------------------- #
+
+print(f"✅ Simulation completed in {time.perf_counter() - start_time:.2f}s.")
+
+plt.show()												# Show plot
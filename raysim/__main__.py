@@ -0,0 +1,132 @@
+"""Headless batch runner.
+
+	python -m raysim scenes/*.json --output results --jobs 8
+
+Each scene file is simulated in a worker process, its measures are written to
+<output>/<name>.json and its trajectories to <output>/<name>.npz.
+matplotlib is only imported with --render.
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import raysim.geometry as geo
+from raysim.scene import Scene, save_rays, measures
+
+
+def run(path: str, output: str, trajectories: bool = True, render: bool = False, checkpoint: float = None) -> dict:
+	"""Simulate a scene file and write its results.
+
+	Parameters:
+	-----------
+	path: str
+		scene file
+	output: str
+		output directory
+	trajectories: bool, optional (default=True)
+		write the trajectories
+	render: bool, optional (default=False)
+		write a picture of the simulation
+	checkpoint: float, optional (default=None)
+		checkpoint interval in seconds - the run resumes from <output>/<name>.ckpt if it exists
+
+	Returns:
+	--------
+	dict, summary of the run
+	"""
+	start_time = time.perf_counter()
+	scene = Scene.from_file(path)
+	options = {} if checkpoint is None else {'checkpoint': os.path.join(output, scene.name + '.ckpt'),
+		'checkpoint_interval': checkpoint, 'resume': True}
+	rays = scene.simulate(print_status=False, print_measures=False, print_stats=False, **options)
+
+	summary = {
+		'scene': path,
+		'name': scene.name,
+		'rays': len(rays),
+		'steps': sum(len(p.positions) for p in rays),
+		'time': time.perf_counter() - start_time,
+		'measures': measures(scene.systems),
+		'budget': scene.budget.report() if scene.budget is not None else None
+	}
+	base = os.path.join(output, scene.name)
+	with open(base + '.json', 'w') as f:
+		json.dump(summary, f, indent=4)
+	if trajectories:
+		with geo.local_precision(scene.precision):
+			save_rays(base + '.npz', rays)
+	if render:
+		import matplotlib
+		matplotlib.use('Agg')
+		from matplotlib.pyplot import subplots, close
+		from raysim.simulation import display
+		fig, ax = subplots()
+		display(rays, scene.systems, scene.playground, scene.sources or None, ax=ax, title=scene.name)
+		fig.savefig(base + '.png')
+		close(fig)
+	return summary
+
+def main(argv: list[str] = None) -> int:
+	"""Command line entry point.
+
+	Parameters:
+	-----------
+	argv: list, optional (default=None)
+		arguments, sys.argv if None
+
+	Returns:
+	--------
+	int, exit status - 1 if a scene failed
+	"""
+	parser = argparse.ArgumentParser(prog='python -m raysim', description='Simulate scene files.')
+	parser.add_argument('scenes', nargs='+', help='JSON scene files')
+	parser.add_argument('-o', '--output', default='.', help='output directory (default: current directory)')
+	parser.add_argument('-j', '--jobs', type=int, default=None, help='worker processes (default: CPU count, no pool if 1)')
+	parser.add_argument('--no-trajectories', action='store_true', help='only write the measures')
+	parser.add_argument('--render', action='store_true', help='write a picture of each simulation (imports matplotlib)')
+	parser.add_argument('--checkpoint', type=float, default=None, metavar='SECONDS',
+		help='checkpoint interval, interrupted runs resume from their checkpoint')
+	parser.add_argument('-q', '--quiet', action='store_true', help='no progress messages')
+	args = parser.parse_args(argv)
+
+	os.makedirs(args.output, exist_ok=True)
+	start_time = time.perf_counter()
+	failed = 0
+	options = (args.output, not args.no_trajectories, args.render, args.checkpoint)
+
+	def report(k: int, path: str, summary: dict = None, error: Exception = None):
+		if args.quiet:
+			return
+		if error is None:
+			truncated = summary['budget'] and [name for name, b in summary['budget'].items() if b['exhausted']]
+			print(f"[{k}/{len(args.scenes)}] ✔ {path}: {summary['rays']} rays in {summary['time']:.2f}s"
+				+ (f" (truncated: {', '.join(truncated)})" if truncated else ""))
+		else:
+			print(f"[{k}/{len(args.scenes)}] ✘ {path}: {type(error).__name__}: {error}")
+
+	if args.jobs == 1:
+		for k, path in enumerate(args.scenes, 1):
+			try:
+				report(k, path, run(path, *options))
+			except Exception as e:
+				failed += 1
+				report(k, path, error=e)
+	else:
+		with ProcessPoolExecutor(args.jobs) as pool:
+			futures = {pool.submit(run, path, *options): path for path in args.scenes}
+			for k, f in enumerate(as_completed(futures), 1):
+				try:
+					report(k, futures[f], f.result())
+				except Exception as e:
+					failed += 1
+					report(k, futures[f], error=e)
+
+	if not args.quiet:
+		print(f"✅ {len(args.scenes) - failed}/{len(args.scenes)} scenes simulated in {time.perf_counter() - start_time:.2f}s.")
+	return 1 if failed else 0
+
+
+if __name__ == '__main__':
+	raise SystemExit(main())
@@ -0,0 +1,124 @@
+import time
+import numpy as np
+from json import dumps
+
+import raysim.geometry as geo
+
+
+class Budget:
+	"""Budget class.
+	Hard resource limits of a simulation, enforced by the engines: limits are inclusive, once work would
+	exceed one the simulation stops gracefully before it and returns the rays traced so far.
+
+	Attributes:
+	-----------
+	steps: int
+		maximum number of steps (stepping engine), interactions (event engine) or batched ray stages
+	rays: int
+		maximum total number of rays
+	live_rays: int
+		maximum number of rays waiting to be traced
+	memory: float
+		maximum approximate memory of the stored trajectories in bytes
+	time: float
+		maximum wall-clock time in seconds
+	used: dict
+		resources used by the last simulation
+	exhausted: list
+		names of the exhausted budgets, in the order they were reached
+
+	Methods:
+	--------
+	start()
+		Reset the counters.
+	charge(steps, rays, live_rays)
+		Account for resources and check the limits.
+	report()
+		Usage of each budget.
+	print_report()
+		Print the usage of each budget.
+	"""
+
+	names = ('steps', 'rays', 'live_rays', 'memory', 'time')
+
+	def __init__(self, steps: int = None, rays: int = None, live_rays: int = None, memory: float = None, time: float = None):
+		"""Initialize a budget, None means unlimited.
+
+		Parameters:
+		-----------
+		steps: int, optional (default=None)
+			maximum number of steps (stepping engine), interactions (event engine) or batched ray stages
+		rays: int, optional (default=None)
+			maximum total number of rays
+		live_rays: int, optional (default=None)
+			maximum number of rays waiting to be traced
+		memory: float, optional (default=None)
+			maximum approximate memory of the stored trajectories in bytes
+		time: float, optional (default=None)
+			maximum wall-clock time in seconds
+		"""
+		self.steps = steps
+		self.rays = rays
+		self.live_rays = live_rays
+		self.memory = memory
+		self.time = time
+		self.start()
+
+	def __repr__(self) -> str:
+		return "Budget(" + ", ".join(f"{name}={getattr(self, name)}" for name in self.names) + ")"
+
+	def start(self):
+		"""Reset the counters, the wall-clock time starts now."""
+		self.used = {name: 0 for name in self.names}
+		self.exhausted = []
+		self._start = time.perf_counter()
+		self._position = 2 * np.dtype(geo.get_dtype()).itemsize			# Stored position in the trajectory
+
+	def charge(self, steps: int = 0, rays: int = None, live_rays: int = None) -> bool:
+		"""Account for resources and check the limits.
+
+		Parameters:
+		-----------
+		steps: int, optional (default=0)
+			steps taken since the last charge, each stores a trajectory position
+		rays: int, optional (default=None)
+			current total number of rays, unchanged if None
+		live_rays: int, optional (default=None)
+			current number of rays waiting to be traced, unchanged if None
+
+		Returns:
+		--------
+		bool, True if a budget is exhausted - the charged steps are then not taken and not counted
+		"""
+		used = self.used
+		used['steps'] += steps
+		used['memory'] += steps * self._position
+		if rays is not None:
+			used['rays'] = rays
+		if live_rays is not None:
+			used['live_rays'] = live_rays
+		used['time'] = time.perf_counter() - self._start
+		for name in self.names:
+			limit = getattr(self, name)
+			if limit is not None and used[name] > limit and name not in self.exhausted:
+				self.exhausted.append(name)
+		if self.exhausted:
+			used['steps'] -= steps
+			used['memory'] -= steps * self._position
+		return bool(self.exhausted)
+
+	def report(self) -> dict:
+		"""Usage of each budget.
+
+		Returns:
+		--------
+		dict, limit, use and exhaustion of each budget
+		"""
+		return {name: {'limit': getattr(self, name), 'used': self.used[name], 'exhausted': name in self.exhausted}
+			for name in self.names}
+
+	def print_report(self):
+		"""Print the usage of each budget."""
+		if self.exhausted:
+			print(f"⚠️  Simulation truncated, budget exhausted: {', '.join(self.exhausted)}")
+		print(dumps(self.report(), indent=4))
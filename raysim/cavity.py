@@ -0,0 +1,79 @@
+import copy
+import numpy as np
+
+import raysim.photon as ph
+import raysim.geometry as geo
+
+
+def find_cycle(photon: ph.Photon, hit: ph.Hit, tolerance: float) -> int:
+	"""Find a previous interaction repeated by a new one.
+	The interaction repeats a previous one of the same system at the same position and in the
+	same direction, with an intensity reduced by a constant ratio.
+
+	Parameters:
+	-----------
+	photon: Photon
+		photon object
+	hit: Hit
+		new interaction
+	tolerance: float
+		position and direction tolerance
+
+	Returns:
+	--------
+	int, index of the repeated interaction in photon.path, None if there is none
+	"""
+	for j in range(len(photon.path) - 1, -1, -1):
+		h = photon.path[j]
+		if h.system != hit.system or h.intensity is None or h.event is None:
+			continue
+		if geo.distance(h.pos, hit.pos) > tolerance \
+			or abs(geo.normalize_angle_negpi_pi(h.dir - hit.dir)) > tolerance:
+			continue
+		if np.shape(h.intensity) != np.shape(hit.intensity):
+			continue
+		ratio = np.divide(hit.intensity, h.intensity, out=np.zeros(np.shape(h.intensity)), where=np.asarray(h.intensity) != 0)
+		if np.all(ratio > 0) and np.all(ratio < 1) and np.allclose(ratio, np.ravel(ratio)[0]):
+			return j
+	return None
+
+def unroll(photon: ph.Photon, hit: ph.Hit, j: int, spawned: dict) -> list[ph.Photon]:
+	"""Sum the remaining round trips of a cavity.
+	Every round trip repeats the rays spawned during the cycle scaled by the ratio r,
+	their sum over the remaining round trips is emitted at once, scaled by r / (1 - r).
+
+	Parameters:
+	-----------
+	photon: Photon
+		photon object, at the start of a new cycle
+	hit: Hit
+		interaction starting the new cycle
+	j: int
+		index of the interaction starting the previous cycle in photon.path
+	spawned: dict
+		copies of the rays spawned by each interaction event, at their creation
+
+	Returns:
+	--------
+	list, aggregated photons - the photon itself is stopped
+	"""
+	cycle = photon.path[j:] + [hit]
+	ratio = float(np.ravel(np.divide(hit.intensity, cycle[0].intensity))[0])
+	length = hit.opl - cycle[0].opl									# Optical path of a round trip
+
+	aggregated = []
+	for k, h in enumerate(cycle[:-1]):
+		following = cycle[k + 1]
+		lineage = False
+		for child in spawned.get(h.event, []):
+			if not lineage and abs(geo.normalize_angle_negpi_pi(child.dir - following.dir)) < 1e-9 \
+				and np.allclose(child.intensity, following.intensity):
+				lineage = True												# Child going on with the cycle
+				continue
+			c = copy.deepcopy(child)
+			c.intensity = c.intensity * ratio / (1 - ratio)
+			c.opl += length													# First repetition
+			c.series = (ratio, length)
+			aggregated.append(c)
+	photon.stopped = True
+	return aggregated
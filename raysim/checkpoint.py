@@ -0,0 +1,126 @@
+import io
+import os
+import time
+import pickle
+
+from raysim.systems import System, Instrumentation
+
+
+class _Pickler(pickle.Pickler):
+	"""Pickler storing the systems of the scene by index."""
+
+	def __init__(self, file: io.BufferedIOBase, systems: list[System]):
+		super().__init__(file, pickle.HIGHEST_PROTOCOL)
+		self.index = {id(s): i for i, s in enumerate(systems)}
+
+	def persistent_id(self, obj: any) -> int:
+		if isinstance(obj, System):
+			return self.index.get(id(obj))
+		return None
+
+class _Unpickler(pickle.Unpickler):
+	"""Unpickler resolving system indices into the systems of the scene."""
+
+	def __init__(self, file: io.BufferedIOBase, systems: list[System]):
+		super().__init__(file)
+		self.systems = systems
+
+	def persistent_load(self, index: int) -> System:
+		return self.systems[index]
+
+
+class Checkpoint:
+	"""Checkpoint class.
+	Periodic snapshot of the state of a simulation in a binary file.
+	Systems are stored by index: photons touching a system get the very system of the scene back,
+	instruments only store their accumulated state (see Instrumentation.get_state).
+	Files are written to a temporary file first and then renamed, a checkpoint is never partially written.
+
+	Attributes:
+	-----------
+	path: str
+		checkpoint file
+	systems: list
+		systems of the scene
+	interval: float
+		minimal time in seconds between two snapshots
+
+	Methods:
+	--------
+	due()
+		Check if a snapshot is due.
+	save(**state)
+		Write a snapshot.
+	load()
+		Read the last snapshot.
+	remove()
+		Remove the checkpoint file.
+	"""
+
+	def __init__(self, path: str, systems: list[System], interval: float = 60):
+		"""Initialize a checkpoint.
+
+		Parameters:
+		-----------
+		path: str
+			checkpoint file
+		systems: list
+			systems of the scene
+		interval: float, optional (default=60)
+			minimal time in seconds between two snapshots
+		"""
+		self.path = path
+		self.systems = systems
+		self.interval = interval
+		self._saved = time.perf_counter()
+
+	def __repr__(self) -> str:
+		return f"Checkpoint(path={self.path}, interval={self.interval})"
+
+	def due(self) -> bool:
+		"""Check if a snapshot is due."""
+		return time.perf_counter() - self._saved >= self.interval
+
+	def save(self, **state):
+		"""Write a snapshot, atomically.
+
+		Parameters:
+		-----------
+		state:
+			simulation state, photons may reference the systems
+		"""
+		snapshot = {
+			'systems': [type(s).__name__ for s in self.systems],
+			'instruments': {i: s.get_state() for i, s in enumerate(self.systems) if isinstance(s, Instrumentation)},
+			'state': state
+		}
+		temporary = f"{self.path}.{os.getpid()}.tmp"
+		with open(temporary, 'wb') as f:
+			_Pickler(f, self.systems).dump(snapshot)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(temporary, self.path)
+		self._saved = time.perf_counter()
+
+	def load(self) -> dict:
+		"""Read the last snapshot, the accumulated state of the instruments is restored.
+
+		Returns:
+		--------
+		dict, simulation state, None if there is no checkpoint
+		"""
+		if not os.path.exists(self.path):
+			return None
+		with open(self.path, 'rb') as f:
+			snapshot = _Unpickler(f, self.systems).load()
+		if snapshot['systems'] != [type(s).__name__ for s in self.systems]:
+			raise ValueError(f"Checkpoint {self.path} was written for other systems.")
+		for i, state in snapshot['instruments'].items():
+			self.systems[i].set_state(state)
+		self._saved = time.perf_counter()
+		return snapshot['state']
+
+	def remove(self):
+		"""Remove the checkpoint file."""
+		if os.path.exists(self.path):
+			os.remove(self.path)
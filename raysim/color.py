@@ -1,5 +1,10 @@
+import numpy as np
+from functools import lru_cache
+
+@lru_cache(maxsize=4096)
 def wavelength_to_color(wavelength: float) -> tuple[int]:
 	"""Convert wavelength to color.
+	Colors are cached, so that photons of a same wavelength share their color.
 	Credits: work of Dan Bruton, http://www.physics.sfasu.edu/astro/color/spectra.html
 
 	Parameters:
@@ -39,6 +44,27 @@ def wavelength_to_color(wavelength: float) -> tuple[int]:
 	color = tuple(int(255 * x * factor) for x in color)
 	return color
 
+def spectrum_to_color(wavelengths: list[float], intensities: list[float]) -> tuple[int]:
+	"""Convert a spectrum to color.
+
+	Parameters:
+	-----------
+	wavelengths: list
+		wavelengths in nm
+	intensities: list
+		intensity of each wavelength
+
+	Returns:
+	--------
+	color: tuple
+		rgb color, intensity weighted mean of the wavelengths colors scaled to full brightness
+	"""
+	rgb = sum(weight * np.array(wavelength_to_color(wavelength), dtype=float)
+		for wavelength, weight in zip(wavelengths, intensities))
+	if np.max(rgb, initial=0) <= 0:
+		return (0, 0, 0)
+	return tuple(int(x) for x in 255 * rgb / np.max(rgb))
+
 def rgb_to_matplotlib(rgb: tuple[int]) -> tuple[float]:
 	"""Convert rgb to matplotlib color.
 
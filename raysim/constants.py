@@ -0,0 +1,4 @@
+c = 299792458				# Speed of light in vacuum (m/s)
+h = 6.62607015e-34			# Planck constant (J.s)
+
+unit = 1e-6					# Scene length unit (m), used for phases and times of flight
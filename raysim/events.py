@@ -0,0 +1,178 @@
+import copy
+import time
+import heapq
+import numpy as np
+from threading import Event
+from typing import Callable
+
+import raysim.photon as ph
+import raysim.geometry as geo
+import raysim.constants as const
+import raysim.cavity as cav
+import raysim.merging as mg
+from raysim.systems import System
+from raysim.checkpoint import Checkpoint
+from raysim.budget import Budget
+
+
+def next_event(photon: ph.Photon, systems: list[System], playground: tuple) -> tuple[int, float]:
+	"""Next interaction of a photon.
+
+	Parameters:
+	-----------
+	photon: Photon
+		photon object
+	systems: list
+		systems list
+	playground: tuple
+		playground limits
+
+	Returns:
+	--------
+	system: int
+		index of the next system, None if the photon leaves the playground first
+	distance: float
+		distance to the system or to the playground border
+	"""
+	pos = np.asarray(photon.pos, dtype=float).reshape(1, 2)
+	t = np.array([s.intersect(pos, [photon.dir])[0] for s in systems] + [np.inf])
+	nearest = int(np.argmin(t))
+	t_exit = geo.ray_box_exit(pos, [photon.dir], playground)[0]
+	if t[nearest] >= t_exit:
+		return None, t_exit
+	return nearest, t[nearest]
+
+def advance(photon: ph.Photon, distance: float):
+	"""Move a photon straight to its next vertex.
+
+	Parameters:
+	-----------
+	photon: Photon
+		photon object
+	distance: float
+		distance
+	"""
+	photon.pos = geo.new_pos(photon.dir, photon.pos, distance)
+	photon.positions.append(photon.pos)
+
+def propagate(photons: list[ph.Photon], systems: list[System], playground: tuple, horizon: float = None,
+	max_rays: int = None, cancel: Event = None, cavity: float = None, checkpoint: Checkpoint = None,
+	state: dict = None, budget: Budget = None, progress: Callable[[list[ph.Photon]], None] = None,
+	progress_interval: float = .05, merge: float = None) -> list[ph.Photon]:
+	"""Event-driven propagation.
+	The next interaction of every ray is an event keyed by its arrival time (optical path / c).
+	Events are processed in time order, rays moving straight from one interaction to the next,
+	so the time horizon and the ray budget cut all branches at the same time.
+
+	Parameters:
+	-----------
+	photons: list
+		list of photons
+	systems: list
+		systems list
+	playground: tuple
+		playground limits
+	horizon: float, optional (default=None)
+		time horizon in seconds, rays are stopped where they are at this time
+	max_rays: int, optional (default=None)
+		maximum number of rays, events are no longer processed once it is exceeded
+	cancel: threading.Event, optional (default=None)
+		stop the propagation as soon as the event is set
+	cavity: float, optional (default=None)
+		position and direction tolerance to detect repeated cavity round trips, see cavity.find_cycle
+	checkpoint: Checkpoint, optional (default=None)
+		checkpoint the pending events are periodically saved to
+	state: dict, optional (default=None)
+		saved state to resume from, photons are then ignored
+	budget: Budget, optional (default=None)
+		resource limits, each interaction is a step - pending rays are stopped where they are once one is reached
+	progress: callable, optional (default=None)
+		called with the list of finished rays when a ray is finished, at most every progress_interval seconds
+	progress_interval: float, optional (default=.05)
+		minimal time in seconds between two progress calls
+	merge: float, optional (default=None)
+		position and direction tolerance to merge a ray leaving an interaction into a coinciding pending ray,
+		see merging.coincident - rays start exactly on the surfaces, so a small tolerance suffices
+
+	Returns:
+	--------
+	list, photons, all stopped
+	"""
+	if state is not None:
+		rays, events, count, spawned = state['rays'], state['events'], state['count'], state['spawned']
+	else:
+		rays = list(photons)
+		events = []
+		count = 0											# Tie breaker of simultaneous events
+		spawned = {}										# Rays spawned by each interaction
+	finished = [p for p in rays if p.stopped]
+	published = time.perf_counter()						# Time of the last progress call
+
+	def schedule(p: ph.Photon):
+		nonlocal count, published
+		if p.stopped:
+			finished.append(p)
+			if progress is not None and time.perf_counter() - published >= progress_interval:
+				progress(finished[:])
+				published = time.perf_counter()
+			return
+		if merge is not None:
+			pending = [e[2] for e in events]
+			same = mg.coincident(p, pending, 0, merge)
+			if same:										# The pending ray carries both from now on
+				mg.combine(pending[same[0]], [p])
+				rays.remove(p)
+				return
+		system, distance = next_event(p, systems, playground)
+		arrival = (p.optical_path + p.n * distance) * const.unit / const.c
+		heapq.heappush(events, (arrival, count, p, system, distance))
+		count += 1
+
+	if state is None:
+		for p in rays:
+			schedule(p)
+
+	while events:
+		if cancel is not None and cancel.is_set():
+			break
+		if max_rays is not None and len(rays) > max_rays:
+			break
+		if budget is not None and budget.charge(1, len(rays), len(events)):
+			if checkpoint is not None:
+				checkpoint.save(engine='event', rays=rays, events=events, count=count, spawned=spawned)
+			break
+		if checkpoint is not None and checkpoint.due():
+			checkpoint.save(engine='event', rays=rays, events=events, count=count, spawned=spawned)
+		arrival, order, p, system, distance = heapq.heappop(events)
+		if horizon is not None and arrival > horizon:
+			heapq.heappush(events, (arrival, order, p, system, distance))
+			break
+
+		advance(p, distance)
+		if system is None:									# Photon leaves the playground
+			p.stopped = True
+			schedule(p)
+			continue
+		p.end_segment()
+		hit = ph.Hit(system, p.pos, p.dir, p.n, copy.copy(p.intensity), p.opl, order)
+		p.touching = systems[system]
+		j = cav.find_cycle(p, hit, cavity) if cavity is not None else None
+		if j is not None:
+			children = cav.unroll(p, hit, j, spawned)		# Remaining round trips at once
+		else:
+			p.path.append(hit)
+			children = []
+			systems[system].touched(p, rays = children)
+			if cavity is not None and children:
+				spawned[hit.event] = copy.deepcopy(children)
+		schedule(p)
+		for c in children:
+			rays.append(c)
+			schedule(c)
+
+	for arrival, _, p, system, distance in events:			# Truncate pending rays
+		if horizon is not None and arrival > horizon:
+			advance(p, max(0, (horizon * const.c / const.unit - p.optical_path) / p.n))
+		p.stopped = True
+
+	return rays
@@ -1,6 +1,206 @@
+import threading
 import numpy as np
+from contextlib import contextmanager
+
+_precision = threading.local()								# Precision of the simulations of each thread
+
+def get_dtype() -> type:
+	"""Storage precision of trajectories, batches and system geometry in the calling thread.
+
+	Returns:
+	--------
+	type, np.float32 or np.float64
+	"""
+	return getattr(_precision, 'dtype', np.float64)
+
+def get_epsilon() -> float:
+	"""Minimum intersection distance in the calling thread.
+	Intersections closer than epsilon are ignored, so that a ray stored at a rounded vertex in front of the
+	system it left does not hit it again: epsilon is a thousand rounding errors of the largest coordinate.
+
+	Returns:
+	--------
+	float, minimum distance
+	"""
+	return getattr(_precision, 'epsilon', 1e3 * np.finfo(np.float64).eps)
+
+def set_precision(precision: str | type = None, extent: float = None):
+	"""Set the storage precision of trajectories, batches and system geometry, for the calling thread only.
+	Only storage is affected: photon positions, intersections and distances are computed in double precision.
+	simulate sets them for the duration of a simulation, see local_precision.
+	Systems created in another precision are resampled by simulate.
+
+	Parameters:
+	-----------
+	precision: str or type, optional (default=None)
+		'single' (float32) or 'double' (float64), or a numpy floating type - unchanged if None
+	extent: float, optional (default=None)
+		largest coordinate of the scene, the minimum intersection distance scales with it - unchanged if None
+	"""
+	if precision is not None:
+		precision = {'single': np.float32, 'double': np.float64}.get(precision, precision)
+		if np.dtype(precision) not in (np.float32, np.float64):
+			raise ValueError("Precision must be 'single' or 'double'.")
+		_precision.dtype = np.dtype(precision).type
+	if extent is not None:
+		_precision.extent = float(extent)
+	_precision.epsilon = 1e3 * np.finfo(get_dtype()).eps * max(getattr(_precision, 'extent', 1), 1)
+
+@contextmanager
+def local_precision(precision: str | type = None, extent: float = None):
+	"""Set the storage precision of the calling thread within a with block, the previous one is restored afterwards.
+
+	Parameters:
+	-----------
+	precision: str or type, optional (default=None)
+		'single' (float32) or 'double' (float64), or a numpy floating type - unchanged if None
+	extent: float, optional (default=None)
+		largest coordinate of the scene - unchanged if None
+	"""
+	previous = get_dtype(), getattr(_precision, 'extent', 1)
+	set_precision(precision, extent)
+	try:
+		yield
+	finally:
+		set_precision(*previous)
+
+
+# ---------------------------------------------------------------------------- #
+#                                 Array kernels                                #
+# ---------------------------------------------------------------------------- #
+# Points have a last axis of size 2, leading axes broadcast. Results can be
+# written to out buffers, to be reused across the steps of a simulation.
+
+def distances(a: np.ndarray, b: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+	"""Distances between points.
+
+	Parameters:
+	-----------
+	a: np.ndarray
+		points, shape (..., 2)
+	b: np.ndarray
+		points, shape (..., 2)
+	out: np.ndarray, optional (default=None)
+		output buffer
+
+	Returns:
+	--------
+	np.ndarray, distances, broadcast shape of the leading axes
+	"""
+	d = np.subtract(a, b, dtype=float)
+	return np.hypot(d[..., 0], d[..., 1], out=out)
+
+def advance(pos: np.ndarray, dirs: np.ndarray, t: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+	"""Move points along directions.
+
+	Parameters:
+	-----------
+	pos: np.ndarray
+		points, shape (..., 2)
+	dirs: np.ndarray
+		directions in radians
+	t: np.ndarray
+		distances
+	out: np.ndarray, optional (default=None)
+		output buffer, shape (..., 2) - may be pos to move the points in place
+
+	Returns:
+	--------
+	np.ndarray, moved points
+	"""
+	pos = np.asarray(pos)
+	if out is None:
+		out = np.empty(np.broadcast_shapes(pos.shape[:-1], np.shape(dirs), np.shape(t)) + (2,),
+			dtype=np.result_type(pos, float))
+	np.add(pos[..., 0], np.cos(dirs) * t, out=out[..., 0])
+	np.add(pos[..., 1], np.sin(dirs) * t, out=out[..., 1])
+	return out
+
+def segment_distances(points: np.ndarray, p1: np.ndarray, p2: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+	"""Distances from points to segments.
+
+	Parameters:
+	-----------
+	points: np.ndarray
+		points, shape (n, 2)
+	p1: np.ndarray
+		first points of the segments, shape (2,) or (m, 2)
+	p2: np.ndarray
+		second points of the segments, shape (2,) or (m, 2)
+	out: np.ndarray, optional (default=None)
+		output buffer
+
+	Returns:
+	--------
+	np.ndarray, distances, shape (n,) or (n, m)
+	"""
+	p1 = np.asarray(p1, dtype=float)
+	p2 = np.asarray(p2, dtype=float)
+	points = np.asarray(points, dtype=float)
+	if p1.ndim == 2:
+		points = points[..., None, :]
+	e = p2 - p1
+	w = points - p1
+	length = np.einsum('...i,...i', e, e)
+	u = np.einsum('...i,...i', w, e) / np.where(length > 0, length, 1)
+	np.clip(u, 0, 1, out=u)
+	w -= u[..., None] * e										# From the closest points
+	return np.hypot(w[..., 0], w[..., 1], out=out)
+
+def inside(points: np.ndarray, box: tuple, out: np.ndarray = None) -> np.ndarray:
+	"""Check if points are strictly inside a box.
+
+	Parameters:
+	-----------
+	points: np.ndarray
+		points, shape (..., 2)
+	box: tuple
+		box (xmin, ymin, xmax, ymax)
+	out: np.ndarray, optional (default=None)
+		boolean output buffer
+
+	Returns:
+	--------
+	np.ndarray, boolean mask
+	"""
+	points = np.asarray(points)
+	x, y = points[..., 0], points[..., 1]
+	out = np.greater(x, box[0], out=out)
+	out &= x < box[2]
+	out &= y > box[1]
+	out &= y < box[3]
+	return out
+
+def wrap_angles(angles: np.ndarray, low: float = -np.pi, period: float = 2 * np.pi, out: np.ndarray = None) -> np.ndarray:
+	"""Reduce angles to the interval [low, low + period].
+
+	Parameters:
+	-----------
+	angles: np.ndarray
+		angles in radians
+	low: float, optional (default=-pi)
+		lower bound
+	period: float, optional (default=2pi)
+		period
+	out: np.ndarray, optional (default=None)
+		output buffer, may be angles
+
+	Returns:
+	--------
+	np.ndarray, reduced angles
+	"""
+	if out is None:
+		return np.mod(np.subtract(angles, low), period) + low
+	np.subtract(angles, low, out=out)
+	np.mod(out, period, out=out)
+	out += low
+	return out
+
+
+# ---------------------------------------------------------------------------- #
+#                                Scalar helpers                                #
+# ---------------------------------------------------------------------------- #
 
-	
 def distance(a: tuple, b: tuple) -> float:
 	"""Calculate the distance between two points.
 
@@ -15,7 +215,7 @@ def distance(a: tuple, b: tuple) -> float:
 	--------
 	float, distance
 	"""
-	return np.sqrt(np.sum((np.array(a) - np.array(b)) ** 2, axis=-1))
+	return distances(a, b)
 
 def new_pos(dir: float, pos: tuple, dx: float) -> tuple:
 	"""Calculate the new position of a point.
@@ -33,7 +233,7 @@ def new_pos(dir: float, pos: tuple, dx: float) -> tuple:
 	--------
 	tuple, new position
 	"""
-	return np.array(pos) + np.array([np.cos(dir), np.sin(dir)]) * dx
+	return advance(np.asarray(pos, dtype=float), dir, dx)
 
 def polygon_mesh(poly: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
 	"""Create a meshgrid from a polygon.
@@ -70,9 +270,7 @@ def is_on_segment(pt: tuple, p1: tuple, p2: tuple, tolerance: float = .1) -> boo
 	--------
 	bool, True if the point is on the segment, False otherwise
 	"""
-	return distance(np.array(pt), np.array(p1)) \
-		+ distance(np.array(pt), np.array(p2)) \
-		- distance(np.array(p1), np.array(p2)) < tolerance
+	return distances(pt, p1) + distances(pt, p2) - distances(p1, p2) < tolerance
 
 def is_in(pos: tuple, box: tuple) -> bool:
 	"""Check if a point is inside a box.
@@ -88,7 +286,7 @@ def is_in(pos: tuple, box: tuple) -> bool:
 	--------
 	bool, True if the point is inside the box, False otherwise
 	"""
-	return box[0] < pos[0] < box[2] and box[1] < pos[1] < box[3]
+	return bool(inside(pos, box))
 
 
 def normalize_angle_negpi_pi(angle: float) -> float:
@@ -103,7 +301,7 @@ def normalize_angle_negpi_pi(angle: float) -> float:
 	--------
 	float, reduced angle
 	"""
-	return (angle + np.pi) % (2 * np.pi) - np.pi
+	return wrap_angles(angle, -np.pi, 2 * np.pi)
 
 def normalize_angle_0_2pi(angle: float) -> float:
 	"""Reduce an angle to the interval [0, 2pi].
@@ -117,7 +315,7 @@ def normalize_angle_0_2pi(angle: float) -> float:
 	--------
 	float, reduced angle
 	"""
-	return angle % (2 * np.pi)
+	return wrap_angles(angle, 0, 2 * np.pi)
 
 def normalize_angle_negpi2_pi2(angle: float) -> float:
 	"""Reduce an angle to the interval [-pi/2, pi/2].
@@ -131,4 +329,106 @@ def normalize_angle_negpi2_pi2(angle: float) -> float:
 	--------
 	float, reduced angle
 	"""
-	return (angle + np.pi/2) % np.pi - np.pi/2
\ No newline at end of file
+	return wrap_angles(angle, -np.pi/2, np.pi)
+
+def ray_segment_intersection(pos: np.ndarray, dirs: np.ndarray, p1: tuple, p2: tuple, eps: float = None,
+	out: np.ndarray = None) -> np.ndarray:
+	"""Calculate the distances from rays to segments.
+
+	Parameters:
+	-----------
+	pos: np.ndarray
+		ray origins, shape (n, 2)
+	dirs: np.ndarray
+		ray directions in radians, shape (n,)
+	p1: tuple or np.ndarray
+		first point of the segment, or of m segments with shape (m, 2)
+	p2: tuple or np.ndarray
+		second point of the segment, or of m segments with shape (m, 2)
+	eps: float, optional (default=None)
+		minimum distance, intersections at the ray origin are ignored - get_epsilon() if None
+	out: np.ndarray, optional (default=None)
+		output buffer
+
+	Returns:
+	--------
+	np.ndarray, distances along the rays, inf where the segment is missed - shape (n,) or (n, m)
+	"""
+	if eps is None:
+		eps = get_epsilon()
+	pos = np.asarray(pos, dtype=float).reshape(-1, 2)
+	dirs = np.asarray(dirs, dtype=float)
+	p1 = np.asarray(p1, dtype=float)
+	p2 = np.asarray(p2, dtype=float)
+	if p1.ndim == 2:
+		pos = pos[:, None, :]
+		dirs = dirs[:, None]
+	e = p2 - p1
+	w = p1 - pos
+	dx, dy = np.cos(dirs), np.sin(dirs)
+
+	denom = dx * e[..., 1] - dy * e[..., 0]
+	with np.errstate(divide='ignore', invalid='ignore'):
+		t = (w[..., 0] * e[..., 1] - w[..., 1] * e[..., 0]) / denom
+		u = (w[..., 0] * dy - w[..., 1] * dx) / denom
+	hit = (denom != 0) & (t > eps) & (u >= 0) & (u <= 1)
+	if out is None:
+		return np.where(hit, t, np.inf)
+	out[...] = np.inf
+	np.copyto(out, t, where=hit)
+	return out
+
+def ray_box_exit(pos: np.ndarray, dirs: np.ndarray, box: tuple, out: np.ndarray = None) -> np.ndarray:
+	"""Calculate the distances from points inside a box to its border along rays.
+
+	Parameters:
+	-----------
+	pos: np.ndarray
+		ray origins, shape (n, 2)
+	dirs: np.ndarray
+		ray directions in radians, shape (n,)
+	box: tuple
+		box
+	out: np.ndarray, optional (default=None)
+		output buffer
+
+	Returns:
+	--------
+	np.ndarray, distances along the rays
+	"""
+	pos = np.asarray(pos, dtype=float).reshape(-1, 2)
+	d = np.stack([np.cos(dirs), np.sin(dirs)], axis=-1)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		tx = np.where(d[:, 0] > 0, (box[2] - pos[:, 0]) / d[:, 0], np.where(d[:, 0] < 0, (box[0] - pos[:, 0]) / d[:, 0], np.inf))
+		ty = np.where(d[:, 1] > 0, (box[3] - pos[:, 1]) / d[:, 1], np.where(d[:, 1] < 0, (box[1] - pos[:, 1]) / d[:, 1], np.inf))
+	out = np.minimum(tx, ty, out=out)
+	return np.maximum(out, 0, out=out)
+
+def ray_box_hit(pos: np.ndarray, dirs: np.ndarray, box: tuple, out: np.ndarray = None) -> np.ndarray:
+	"""Check if rays cross a box, for spatial culling.
+
+	Parameters:
+	-----------
+	pos: np.ndarray
+		ray origins, shape (n, 2)
+	dirs: np.ndarray
+		ray directions in radians, shape (n,)
+	box: tuple
+		box (xmin, ymin, xmax, ymax)
+	out: np.ndarray, optional (default=None)
+		boolean output buffer
+
+	Returns:
+	--------
+	np.ndarray, True where the ray crosses the box
+	"""
+	pos = np.asarray(pos, dtype=float).reshape(-1, 2)
+	d = np.stack([np.cos(dirs), np.sin(dirs)], axis=-1)
+	with np.errstate(divide='ignore', invalid='ignore'):
+		t1 = (np.array(box[:2]) - pos) / d
+		t2 = (np.array(box[2:]) - pos) / d
+	parallel = d == 0
+	inside = (pos >= box[:2]) & (pos <= box[2:])						# Parallel rays within the slab
+	low = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t1, t2))
+	high = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t1, t2))
+	return np.greater_equal(np.min(high, axis=1), np.maximum(np.max(low, axis=1), 0), out=out)
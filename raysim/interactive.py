@@ -0,0 +1,157 @@
+import time
+from threading import Condition, Event, Thread
+from typing import Callable
+
+from matplotlib.pyplot import Axes
+
+import raysim.photon as ph
+import raysim.source as src
+from raysim.simulation import simulate
+from raysim.systems import System
+from raysim.view import SceneView
+
+
+class Session:
+	"""Interactive simulation session.
+	Scenes are simulated by a background worker so that the figure stays responsive:
+	rapid requests are coalesced, superseded simulations are cancelled and
+	finished rays are displayed while the simulation is running.
+
+	Attributes:
+	-----------
+	scene: callable
+		scene(*args) returns the initial rays and the systems of the scene
+	playground: tuple
+		playground limits
+	view: SceneView
+		persistent scene view
+	delay: float
+		quiet time in seconds before a request is simulated
+	on_result: callable
+		called in the figure thread with (rays, systems, done) before each redraw
+	rays: list
+		last displayed rays
+	systems: list
+		last displayed systems
+
+	Methods:
+	--------
+	request(*args)
+		Request the simulation of a scene.
+	close()
+		Stop the worker.
+	"""
+
+	def __init__(self, scene: Callable[..., tuple[list[ph.Photon], list[System]]], playground: tuple, ax: Axes,
+		sources: list[src.Source] | tuple[float] = None, title: str = None, delay: float = .1, interval: int = 50,
+		on_result: Callable[[list[ph.Photon], list[System], bool], None] = None, **kwargs):
+		"""Initialize an interactive session.
+
+		Parameters:
+		-----------
+		scene: callable
+			scene(*args) returns the initial rays and the systems of the scene - systems must not be shared between scenes
+		playground: tuple
+			playground limits
+		ax: matplotlib.pyplot.Axes
+			axis
+		sources: list or tuple, optional (default=None)
+			sources displayed with the scene
+		title: str, optional (default=None)
+			axis title
+		delay: float, optional (default=.1)
+			quiet time in seconds before a request is simulated
+		interval: int, optional (default=50)
+			refresh period of the figure in milliseconds
+		on_result: callable, optional (default=None)
+			called in the figure thread with (rays, systems, done) before each redraw
+		kwargs:
+			simulate keyword arguments
+		"""
+		self.scene = scene
+		self.playground = playground
+		self.view = SceneView(playground, ax, sources, title)
+		self.delay = delay
+		self.on_result = on_result
+		self.kwargs = {'print_status': False, 'print_measures': False, 'print_stats': False, 'progress_interval': interval / 1000, **kwargs}
+
+		self.rays = []
+		self.systems = []
+
+		self._condition = Condition()
+		self._args = None							# Pending request
+		self._requested = 0							# Time of the last request
+		self._generation = 0						# Incremented by each request
+		self._cancel = Event()
+		self._result = None							# (generation, rays, systems, done)
+		self._drawn = None
+		self._closed = False
+
+		self._worker = Thread(target=self._work, daemon=True)
+		self._worker.start()
+
+		self._timer = ax.figure.canvas.new_timer(interval=interval)
+		self._timer.add_callback(self._refresh)
+		self._timer.start()
+
+	def request(self, *args):
+		"""Request the simulation of a scene.
+		The running simulation is cancelled, the last request within delay wins.
+
+		Parameters:
+		-----------
+		args:
+			scene arguments
+		"""
+		with self._condition:
+			self._args = args
+			self._requested = time.perf_counter()
+			self._generation += 1
+			self._cancel.set()
+			self._condition.notify()
+
+	def close(self):
+		"""Stop the worker."""
+		with self._condition:
+			self._closed = True
+			self._cancel.set()
+			self._condition.notify()
+		self._timer.stop()
+
+	def _work(self):
+		"""Worker loop, simulate the last request."""
+		while True:
+			with self._condition:
+				while self._args is None and not self._closed:
+					self._condition.wait()
+				if self._closed:
+					return
+				wait = self._requested + self.delay - time.perf_counter()
+				if wait > 0:								# Coalesce rapid requests
+					self._condition.wait(wait)
+					continue
+				args, generation = self._args, self._generation
+				self._args = None
+				self._cancel = cancel = Event()
+
+			initial_rays, systems = self.scene(*args)
+			publish = lambda rays, done=False: self._publish(generation, rays, systems, done)
+			rays = simulate(initial_rays, systems, self.playground, cancel=cancel, progress=publish, **self.kwargs)
+			if not cancel.is_set():
+				publish(rays, True)
+
+	def _publish(self, generation: int, rays: list[ph.Photon], systems: list[System], done: bool):
+		"""Store a result for the figure thread, dropping superseded ones."""
+		if generation == self._generation:
+			self._result = (generation, rays, systems, done)		# Fresh lists, not modified by the worker
+
+	def _refresh(self):
+		"""Figure timer callback, display the last result."""
+		result = self._result
+		if result is None or result is self._drawn:
+			return
+		self._drawn = result
+		_, self.rays, self.systems, done = result
+		if self.on_result is not None:
+			self.on_result(self.rays, self.systems, done)
+		self.view.update(self.rays, self.systems)
@@ -0,0 +1,80 @@
+import numpy as np
+from collections import namedtuple
+
+import raysim.photon as ph
+import raysim.geometry as geo
+
+Component = namedtuple('Component', ['weight', 'opl', 'path', 'start', 'series'])
+Component.__doc__ = """Ray merged into a photon.
+
+	Attributes:
+	-----------
+	weight: float
+		fraction of the photon intensity
+	opl: float
+		optical path length relative to the photon
+	path: list
+		interactions (Hit) of the ray before the merge
+	start: int
+		length of the photon path at the merge, later interactions are shared
+	series: tuple
+		cavity series of the ray, see Photon.series
+	"""
+
+
+def coincident(photon: ph.Photon, rays: list[ph.Photon], start: int, tolerance: float) -> list[int]:
+	"""Find the pending rays coinciding with a photon.
+	Rays coincide if they have the same position and direction within tolerance, the same
+	wavelength and refractive index and touch the same system.
+
+	Parameters:
+	-----------
+	photon: Photon
+		photon object
+	rays: list
+		list of rays
+	start: int
+		index of the first candidate in rays
+	tolerance: float
+		position and direction tolerance
+
+	Returns:
+	--------
+	list, indices of the coinciding rays
+	"""
+	if type(photon) is not ph.Photon:
+		return []
+	candidates = [j for j in range(start, len(rays)) if type(rays[j]) is ph.Photon and not rays[j].stopped
+		and rays[j].touching is photon.touching and rays[j].wavelength == photon.wavelength and rays[j].n == photon.n]
+	if not candidates:
+		return []
+	pos = np.array([rays[j].pos for j in candidates], dtype=float)
+	dirs = np.array([rays[j].dir for j in candidates], dtype=float)
+	close = (geo.distances(pos, photon.pos) <= tolerance) & (np.abs(geo.wrap_angles(dirs - photon.dir)) <= tolerance)
+	return [j for j, c in zip(candidates, close) if c]
+
+def combine(photon: ph.Photon, others: list[ph.Photon]):
+	"""Merge rays into a photon, which carries their summed intensity from now on.
+	The provenance and relative optical path of every merged ray is kept in photon.components,
+	so that coherent instruments still sum them separately.
+
+	Parameters:
+	-----------
+	photon: Photon
+		photon object, modified in place
+	others: list
+		rays merged into the photon
+	"""
+	total = photon.intensity + sum(q.intensity for q in others)
+	start = len(photon.path)
+	components = []
+	for q in [photon] + others:
+		delta = q.optical_path - photon.optical_path
+		share = q.intensity / total if total else 1 / (len(others) + 1)
+		if q.components is None:
+			components.append(Component(share, delta, list(q.path), start, q.series))
+		else:
+			components.extend(Component(c.weight * share, c.opl + delta, c.path + q.path[c.start:], start, c.series)
+				for c in q.components)
+	photon.intensity = total
+	photon.components = components
@@ -0,0 +1,163 @@
+import numpy as np
+from typing import Callable
+
+import raysim.geometry as geo
+
+
+# ---------------------------------------------------------------------------- #
+#                               Refractive indices                             #
+# ---------------------------------------------------------------------------- #
+
+class Cauchy:
+	"""Cauchy dispersion law.
+	n(wavelength) = A + B / wavelength^2 + C / wavelength^4, wavelength in µm.
+
+	Attributes:
+	-----------
+	A: float
+		constant term
+	B: float
+		second order coefficient (µm^2)
+	C: float
+		fourth order coefficient (µm^4)
+	"""
+
+	def __init__(self, A: float, B: float = 0, C: float = 0):
+		"""Initialize a Cauchy index.
+
+		Parameters:
+		-----------
+		A: float
+			constant term
+		B: float, optional (default=0)
+			second order coefficient (µm^2)
+		C: float, optional (default=0)
+			fourth order coefficient (µm^4)
+		"""
+		self.A = A
+		self.B = B
+		self.C = C
+
+	def __repr__(self) -> str:
+		return f"Cauchy(A={self.A}, B={self.B}, C={self.C})"
+
+	def __call__(self, wavelength: float | np.ndarray) -> np.ndarray:
+		"""Refractive index for wavelengths in nm."""
+		wl = np.asarray(wavelength, dtype=float) / 1000
+		return self.A + self.B / wl**2 + self.C / wl**4
+
+
+class Sellmeier:
+	"""Sellmeier dispersion law.
+	n(wavelength)^2 = 1 + sum(B_i * wavelength^2 / (wavelength^2 - C_i)), wavelength in µm.
+
+	Attributes:
+	-----------
+	B: tuple
+		numerator coefficients
+	C: tuple
+		resonance coefficients (µm^2)
+	"""
+
+	def __init__(self, B: tuple[float], C: tuple[float]):
+		"""Initialize a Sellmeier index.
+
+		Parameters:
+		-----------
+		B: tuple
+			numerator coefficients
+		C: tuple
+			resonance coefficients (µm^2)
+		"""
+		if len(B) != len(C):
+			raise ValueError("B and C must have the same length.")
+		self.B = tuple(B)
+		self.C = tuple(C)
+
+	def __repr__(self) -> str:
+		return f"Sellmeier(B={self.B}, C={self.C})"
+
+	def __call__(self, wavelength: float | np.ndarray) -> np.ndarray:
+		"""Refractive index for wavelengths in nm."""
+		wl2 = (np.asarray(wavelength, dtype=float) / 1000) ** 2
+		n2 = 1 + sum(b * wl2 / (wl2 - c) for b, c in zip(self.B, self.C))
+		return np.sqrt(n2)
+
+
+BK7 = Sellmeier((1.03961212, 0.231792344, 1.01046945),
+	(0.00600069867, 0.0200179144, 103.560653))				# Schott N-BK7 crown glass
+FUSED_SILICA = Sellmeier((0.6961663, 0.4079426, 0.8974794),
+	(0.0684043**2, 0.1162414**2, 9.896161**2))				# Fused silica (Malitson)
+WATER = Cauchy(1.3199, 0.006878, -0.000132)					# Water at 20°C
+
+
+def index(n: float | Callable, wavelength: float | np.ndarray) -> np.ndarray:
+	"""Evaluate a refractive index.
+
+	Parameters:
+	-----------
+	n: float or callable
+		constant index, or dispersion law taking wavelengths in nm
+	wavelength: float or np.ndarray
+		wavelengths in nm
+
+	Returns:
+	--------
+	np.ndarray, refractive indices with the shape of wavelength
+	"""
+	if callable(n):
+		return np.asarray(n(wavelength), dtype=float)
+	return np.full(np.shape(wavelength), n, dtype=float)
+
+
+# ---------------------------------------------------------------------------- #
+#                                  Refraction                                  #
+# ---------------------------------------------------------------------------- #
+
+def refract(dirs: np.ndarray, normal: float | np.ndarray, n1: np.ndarray, n2: np.ndarray) -> tuple[np.ndarray]:
+	"""Snell-Descartes law and Fresnel coefficients for a batch of rays.
+	The normal points from the medium of index n1 to the medium of index n2,
+	rays may come from either side. Light is assumed unpolarized.
+
+	Parameters:
+	-----------
+	dirs: np.ndarray
+		incident directions in radians
+	normal: float or np.ndarray
+		interface normal in radians
+	n1: np.ndarray
+		refractive indices behind the interface
+	n2: np.ndarray
+		refractive indices in front of the interface
+
+	Returns:
+	--------
+	reflected: np.ndarray
+		reflected directions in radians
+	transmitted: np.ndarray
+		transmitted directions in radians, nan on total internal reflection
+	R: np.ndarray
+		reflectance [0,1], transmittance is 1 - R
+	n_out: np.ndarray
+		refractive indices of the media the rays are transmitted into
+	"""
+	dirs = np.asarray(dirs, dtype=float)
+	forward = np.cos(dirs - normal) > 0						# Rays going from n1 to n2
+	n_in = np.where(forward, n1, n2)
+	n_out = np.where(forward, n2, n1)
+	side = np.where(forward, normal, normal + np.pi)		# Normal on the transmission side
+
+	theta_i = geo.normalize_angle_negpi_pi(dirs - side)
+	sin_t = n_in / n_out * np.sin(theta_i)
+	tir = np.abs(sin_t) >= 1								# Total internal reflection
+	theta_t = np.arcsin(np.clip(sin_t, -1, 1))
+
+	cos_i = np.cos(theta_i)
+	cos_t = np.cos(theta_t)
+	rs = (n_in * cos_i - n_out * cos_t) / (n_in * cos_i + n_out * cos_t)
+	rp = (n_in * cos_t - n_out * cos_i) / (n_in * cos_t + n_out * cos_i)
+	R = np.where(tir, 1., (rs**2 + rp**2) / 2)
+
+	reflected = geo.normalize_angle_0_2pi(np.pi + 2 * np.asarray(normal) - dirs)
+	transmitted = np.where(tir, np.nan, geo.normalize_angle_0_2pi(side + theta_t))
+	return reflected, transmitted, R, n_out
@@ -1,8 +1,32 @@
+import weakref
 import numpy as np
+from collections import namedtuple
 
 import raysim.geometry as geo
 import raysim.color as col
+import raysim.constants as const
 from raysim.source import Source
+
+Hit = namedtuple('Hit', ['system', 'pos', 'dir', 'n', 'intensity', 'opl', 'event'], defaults=(None, None, None))
+Hit.__doc__ = """Interaction of a photon with a system.
+
+	Attributes:
+	-----------
+	system: int
+		index of the touched system
+	pos: tuple
+		interaction position
+	dir: float
+		incident direction in radians
+	n: float
+		refractive index before the interaction
+	intensity: float, optional
+		intensity before the interaction
+	opl: float, optional
+		optical path length at the interaction
+	event: int, optional
+		index of the interaction in the simulation
+	"""
 	
 def has_reached_sys(photon: any, systems: list[any]) -> bool:
 	"""Check if the photon has reached a system.
@@ -19,7 +43,7 @@ def has_reached_sys(photon: any, systems: list[any]) -> bool:
 	bool, True if the photon has reached a system, False otherwise
 	"""
 	for s in systems:
-		if np.min(geo.distance(np.array(photon.pos), np.array(s.hitbox))) < .05:
+		if np.min(geo.distances(photon.pos, s.hitbox)) < .05:
 			# When the photon reaches a system, return True
 			return True
 	return False
@@ -39,11 +63,93 @@ def touched_sys(photon: any, systems: list[any]) -> any:
 	any, system object
 	"""
 	for s in systems:
-		if np.min(geo.distance(np.array(photon.pos), np.array(s.hitbox)[:])) < .05:
+		if np.min(geo.distances(photon.pos, s.hitbox)) < .05:
 			# When the photon reaches a system, return the system
 			return s
 	return None
 
+_sources = weakref.WeakValueDictionary()					# Interned sources, by (position, wavelength, power) - dropped with their last photon
+
+def intern_source(position: tuple[float], wavelength: float, power: float) -> Source:
+	"""Return the shared source of the given parameters, created on first use.
+	Sources are only kept alive by the photons referencing them.
+
+	Parameters:
+	-----------
+	position: tuple
+		source position
+	wavelength: float
+		wavelength in nm
+	power: float
+		source power
+
+	Returns:
+	--------
+	Source, shared source object
+	"""
+	key = (tuple(np.ravel(position).tolist()), float(wavelength), float(power))
+	source = _sources.get(key)
+	if source is None:
+		source = _sources[key] = Source(position, wavelength, power)
+	return source
+
+
+class Trajectory:
+	"""Trajectory class.
+	Positions of a photon in a single growable array in storage precision (see geometry.set_precision),
+	with the list operations used on trajectories: a position costs 8 or 16 bytes instead of an array object.
+
+	Methods:
+	--------
+	append(pos)
+		Append a position.
+	copy()
+		Copy the trajectory.
+	"""
+	__slots__ = ('_data', '_size')
+
+	def __init__(self, positions: list | np.ndarray = ()):
+		"""Initialize a trajectory.
+
+		Parameters:
+		-----------
+		positions: list or np.ndarray, optional (default=())
+			initial positions
+		"""
+		positions = np.asarray(positions, dtype=geo.get_dtype()).reshape(-1, 2)
+		self._size = len(positions)
+		self._data = np.empty((max(4, self._size), 2), dtype=positions.dtype)
+		self._data[:self._size] = positions
+
+	def append(self, pos: tuple | np.ndarray):
+		"""Append a position, the array doubles when it is full."""
+		if self._size == len(self._data):
+			self._data = np.concatenate([self._data, np.empty_like(self._data)])
+		self._data[self._size] = pos
+		self._size += 1
+
+	def copy(self) -> 'Trajectory':
+		"""Copy the trajectory."""
+		return Trajectory(self._data[:self._size])
+
+	def __len__(self) -> int:
+		return self._size
+
+	def __getitem__(self, index: int | slice) -> np.ndarray:
+		return self._data[:self._size][index]
+
+	def __iter__(self):
+		return iter(self._data[:self._size])
+
+	def __array__(self, dtype: type = None, copy: bool = None) -> np.ndarray:
+		return np.asarray(self._data[:self._size], dtype=dtype)
+
+	def __add__(self, other: list | np.ndarray) -> 'Trajectory':
+		return Trajectory(np.concatenate([self._data[:self._size], np.asarray(other, dtype=float).reshape(-1, 2)]))
+
+	def __repr__(self) -> str:
+		return f"Trajectory({self._data[:self._size].tolist()})"
+
 
 class Photon:
 	"""Photon class.
@@ -56,8 +162,8 @@ class Photon:
 		photon direction in radians
 	dx: float
 		step size
-	positions: list
-		photon positions
+	positions: Trajectory
+		photon positions, lists are converted on assignment
 	directions: list
 		photon directions
 	n: float
@@ -66,12 +172,29 @@ class Photon:
 		photon status
 	touching: any
 		touched system
+	opl: float
+		optical path length accumulated up to the last interaction
+	vertex: tuple
+		position of the last interaction
+	path: list
+		interactions (Hit) of the photon and of its parents
+	series: tuple
+		(ratio, optical path) of the geometric series of cavity round trips the photon stands for, or None
+	components: list
+		rays merged into the photon (merging.Component), None if it has not been merged
 
 	Methods:
 	--------
+	from_arrays(positions, dirs, wavelengths, intensities)
+		Create many photons at once.
 	move()
 		Move the photon in the direction of its direction.
+	end_segment()
+		Accumulate the optical path length of the current segment.
 	"""
+	__slots__ = ('source', 'pos', 'dir', 'dx', '_positions', 'directions', 'virtual_source', 'n', 'intensity',
+		'stopped', 'touching', 'wavelength', 'color', 'opl', 'vertex', 'path', 'series', 'components')
+
 	def __init__(self, source: Source | tuple[float], pos: tuple[float] = None, dir: float = 0, dx: float = .01,
 		n: float = 1, intensity: float = 1, touching: any = None, wavelength: int = 650, virtual_source: tuple[float] = None):
 			"""Initialize a photon object.
@@ -92,7 +215,7 @@ class Photon:
 			if isinstance(source, Source):
 				self.source = source
 			elif isinstance(source, tuple):
-				self.source = Source(source, wavelength, intensity)
+				self.source = intern_source(source, wavelength, intensity)
 			else:
 				raise ValueError("Source must be a Source or a tuple.")
 			
@@ -117,6 +240,97 @@ class Photon:
 			self.wavelength = wavelength
 			
 			self.color = col.wavelength_to_color(wavelength)
+
+			self.opl = 0
+			self.vertex = self.pos
+			self.path = []
+			self.series = None
+			self.components = None
+
+	@classmethod
+	def from_arrays(cls, positions: np.ndarray, dirs: np.ndarray, wavelengths: np.ndarray | float = 650,
+		intensities: np.ndarray | float = 1, source: Source | tuple[float] = None, n: float = 1, dx: float = .01) -> list['Photon']:
+		"""Create many photons at once.
+		This is only a faster constructor, not an array-backed view: every photon is still a Python object,
+		filled directly from the arrays without running __init__, and they share their source and the colors
+		of their wavelengths. Array storage of rays is RayBatch, used by the sequential engine.
+
+		Parameters:
+		-----------
+		positions: np.ndarray
+			photons positions, shape (n, 2)
+		dirs: np.ndarray or float
+			photons directions in radians
+		wavelengths: np.ndarray or float, optional (default=650)
+			wavelengths in nm
+		intensities: np.ndarray or float, optional (default=1)
+			intensities
+		source: Source or tuple, optional (default=None)
+			shared source, at the first position if None
+		n: float, optional (default=1)
+			refractive index
+		dx: float, optional (default=.01)
+			step size
+
+		Returns:
+		--------
+		list, photons
+		"""
+		positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+		count = len(positions)
+		dirs = np.broadcast_to(np.asarray(dirs, dtype=float), (count,)).tolist()
+		intensities = np.broadcast_to(np.asarray(intensities, dtype=float), (count,)).tolist()
+		unique, inverse = np.unique(np.broadcast_to(wavelengths, (count,)), return_inverse=True)
+		colors = [col.wavelength_to_color(w) for w in unique.tolist()]
+		unique = unique.tolist()
+		if source is None or isinstance(source, tuple):
+			origin = source if source is not None else tuple(positions[0].tolist()) if count else (0, 0)
+			source = intern_source(origin, unique[0] if count else 650, 1)
+
+		photons = []
+		for pos, d, w, i in zip(map(tuple, positions.tolist()), dirs, inverse.tolist(), intensities):
+			p = object.__new__(cls)
+			p.source = source
+			p.pos = p.virtual_source = p.vertex = pos
+			p.dir = d
+			p.dx = dx
+			p._positions = Trajectory([pos])
+			p.directions = [d]
+			p.n = n
+			p.intensity = i
+			p.stopped = False
+			p.touching = None
+			p.wavelength = unique[w]
+			p.color = colors[w]
+			p.opl = 0
+			p.path = []
+			p.series = None
+			p.components = None
+			photons.append(p)
+		return photons
+
+	def __copy__(self) -> 'Photon':
+		"""Return a shallow copy of the photon."""
+		p = object.__new__(type(self))
+		for name in Photon.__slots__:
+			setattr(p, name, getattr(self, name))
+		return p
+
+	def __deepcopy__(self, memo: dict) -> 'Photon':
+		"""Return a copy of the photon owning its trajectory.
+		The source and the touched system are shared, unless they have been copied along.
+		"""
+		p = self.__copy__()
+		memo[id(self)] = p
+		p.positions = self.positions.copy()
+		p.directions = list(self.directions)
+		p.path = list(self.path)
+		p.touching = memo.get(id(self.touching), self.touching)
+		if isinstance(self.intensity, np.ndarray):
+			p.intensity = self.intensity.copy()
+		if isinstance(self.wavelength, np.ndarray):
+			p.wavelength = self.wavelength.copy()
+		return p
 	
 	def __str__(self) -> str:
 		"""Return the string representation of the photon.
@@ -128,8 +342,277 @@ class Photon:
 		"""
 		return f"Photon(pos={self.pos}, dir={self.dir}, dx={self.dx}, n={self.n}, intensity={self.intensity}, touching={self.touching}, wavelength={self.wavelength})"
 	
+	@property
+	def positions(self) -> Trajectory:
+		"""Photon positions."""
+		return self._positions
+
+	@positions.setter
+	def positions(self, positions: Trajectory | list):
+		self._positions = positions if isinstance(positions, Trajectory) else Trajectory(positions)
+
 	def move(self):
 		"""Move the photon in the direction of its direction.
 		"""
 		self.pos = geo.new_pos(self.dir, self.pos, self.dx)
-		self.positions.append(self.pos)
\ No newline at end of file
+		self.positions.append(self.pos)
+
+	def end_segment(self):
+		"""Accumulate the optical path length of the current segment.
+		The segment from the last interaction is straight, its optical length is its length times n.
+		"""
+		self.opl += self.n * geo.distance(self.pos, self.vertex)
+		self.vertex = self.pos
+
+	@property
+	def optical_path(self) -> float:
+		"""Optical path length from the source to the current position."""
+		return self.opl + self.n * geo.distance(self.pos, self.vertex)
+
+	@property
+	def time(self) -> float:
+		"""Time of flight from the source to the current position, in seconds."""
+		return self.optical_path * const.unit / const.c
+
+	@property
+	def phase(self) -> float:
+		"""Phase accumulated from the source to the current position, in radians."""
+		return 2 * np.pi * self.optical_path * const.unit / (self.wavelength * 1e-9)
+
+
+class SpectralPhoton(Photon):
+	"""Spectral photon class.
+	Photon carrying (wavelength, intensity) samples along a single geometric path.
+
+	Attributes:
+	-----------
+	wavelength: np.ndarray
+		wavelengths of the samples in nm
+	intensity: np.ndarray
+		intensities of the samples
+	see Photon for other attributes
+
+	Methods:
+	--------
+	select(mask)
+		Keep a subset of the samples.
+	see Photon for other methods
+	"""
+	__slots__ = ()
+
+	def __init__(self, source: Source | tuple[float], pos: tuple[float] = None, dir: float = 0, dx: float = .01,
+		n: float = 1, intensity: float | np.ndarray = 1, touching: any = None, wavelength: np.ndarray = np.linspace(400, 700, 31),
+		virtual_source: tuple[float] = None):
+		"""Initialize a spectral photon object.
+
+		Parameters:
+		-----------
+		wavelength: np.ndarray, optional (default=400nm to 700nm by 10nm)
+			wavelengths of the samples in nm
+		intensity: float or np.ndarray, optional (default=1)
+			intensities of the samples
+		see Photon for other parameters
+		"""
+		wavelength = np.atleast_1d(np.asarray(wavelength))
+		intensity = np.array(np.broadcast_to(intensity, wavelength.shape), dtype=float)
+		super().__init__(source, pos, dir, dx, n, float(np.sum(intensity)), touching, float(np.mean(wavelength)), virtual_source)
+		self.wavelength = wavelength
+		self.intensity = intensity
+		self.select(np.ones(len(wavelength), dtype=bool))
+
+	def __str__(self) -> str:
+		return f"SpectralPhoton at {self.pos} ({len(self.wavelength)} samples)"
+
+	def select(self, mask: np.ndarray) -> 'SpectralPhoton':
+		"""Keep a subset of the samples.
+
+		Parameters:
+		-----------
+		mask: np.ndarray
+			boolean mask or indices of the kept samples
+
+		Returns:
+		--------
+		SpectralPhoton, the photon itself
+		"""
+		self.wavelength = self.wavelength[mask]
+		self.intensity = self.intensity[mask]
+		self.color = col.spectrum_to_color(self.wavelength, self.intensity)
+		return self
+
+
+class RayBatch:
+	"""Batch of rays stored as arrays, for vectorized tracing.
+	Rows sharing a trail record the positions and interactions of their previous stages.
+
+	Attributes:
+	-----------
+	pos: np.ndarray
+		positions, shape (n, 2), stored in geometry precision (see geometry.set_precision)
+	dir: np.ndarray
+		directions in radians
+	wavelength: np.ndarray
+		wavelengths in nm
+	intensity: np.ndarray
+		intensities
+	n: np.ndarray
+		refractive indices
+	opl: np.ndarray
+		optical path lengths
+	photon: np.ndarray
+		index of the photon each ray comes from
+	node: np.ndarray
+		index of each ray in the last trail record, -1 if there is none
+	stopped: np.ndarray
+		rays status
+	trail: list
+		records (system, pos, dir, n, parent) of the interactions of the batch
+	photons: list
+		photons the batch was created from
+
+	Methods:
+	--------
+	take(index)
+		Select rays.
+	copy()
+		Copy the batch.
+	concat(batches)
+		Concatenate batches sharing a trail and photons.
+	advance(t)
+		Move the rays in their directions.
+	record(system)
+		Record an interaction of all rays.
+	history()
+		Interactions and vertices of the rays.
+	"""
+
+	fields = ('pos', 'dir', 'wavelength', 'intensity', 'n', 'opl', 'photon', 'node', 'stopped')
+
+	def __init__(self, pos: np.ndarray, dir: np.ndarray, wavelength: np.ndarray, intensity: np.ndarray,
+		n: np.ndarray, opl: np.ndarray, photon: np.ndarray, node: np.ndarray = None, stopped: np.ndarray = None, trail: list = None, photons: list[Photon] = None):
+		"""Initialize a batch of rays.
+
+		Parameters:
+		-----------
+		see attributes
+		"""
+		self.pos = np.asarray(pos, dtype=geo.get_dtype()).reshape(-1, 2)
+		self.dir = np.asarray(dir, dtype=float)
+		self.wavelength = np.asarray(wavelength)
+		self.intensity = np.asarray(intensity, dtype=float)
+		self.n = np.asarray(n, dtype=float)
+		self.opl = np.asarray(opl, dtype=float)
+		self.photon = np.asarray(photon, dtype=int)
+		self.node = np.full(len(self.pos), -1) if node is None else np.asarray(node, dtype=int)
+		self.stopped = np.zeros(len(self.pos), dtype=bool) if stopped is None else np.asarray(stopped, dtype=bool)
+		self.trail = [] if trail is None else trail
+		self.photons = [] if photons is None else photons
+
+	@classmethod
+	def from_photons(cls, photons: list[Photon]) -> 'RayBatch':
+		"""Create a batch from photons.
+
+		Parameters:
+		-----------
+		photons: list
+			list of photons
+
+		Returns:
+		--------
+		RayBatch, batch whose photon field indexes the list
+		"""
+		return cls(
+			pos=np.array([p.pos for p in photons], dtype=geo.get_dtype()),
+			dir=[p.dir for p in photons],
+			wavelength=np.array([p.wavelength for p in photons]),
+			intensity=[p.intensity for p in photons],
+			n=[p.n for p in photons],
+			opl=[p.optical_path for p in photons],
+			photon=np.arange(len(photons)),
+			photons=photons
+		)
+
+	def __len__(self) -> int:
+		return len(self.pos)
+
+	def __repr__(self) -> str:
+		return f"RayBatch({len(self)} rays, {len(self.trail)} interactions)"
+
+	def take(self, index: np.ndarray) -> 'RayBatch':
+		"""Select rays.
+
+		Parameters:
+		-----------
+		index: np.ndarray
+			boolean mask or indices
+
+		Returns:
+		--------
+		RayBatch, selected rays sharing the trail and photons
+		"""
+		return RayBatch(**{f: getattr(self, f)[index] for f in self.fields}, trail=self.trail, photons=self.photons)
+
+	def copy(self) -> 'RayBatch':
+		"""Copy the batch, the trail and photons are shared."""
+		return RayBatch(**{f: getattr(self, f).copy() for f in self.fields}, trail=self.trail, photons=self.photons)
+
+	@staticmethod
+	def concat(batches: list['RayBatch']) -> 'RayBatch':
+		"""Concatenate batches sharing a trail and photons.
+
+		Parameters:
+		-----------
+		batches: list
+			batches to concatenate
+
+		Returns:
+		--------
+		RayBatch, concatenated batch
+		"""
+		return RayBatch(**{f: np.concatenate([getattr(b, f) for b in batches]) for f in RayBatch.fields},
+			trail=batches[0].trail, photons=batches[0].photons)
+
+	def advance(self, t: np.ndarray):
+		"""Move the rays in their directions, accumulating their optical path.
+
+		Parameters:
+		-----------
+		t: np.ndarray
+			distances
+		"""
+		self.pos = geo.advance(self.pos, self.dir, t, out=np.empty_like(self.pos))
+		self.opl = self.opl + self.n * t
+
+	def record(self, system: int | np.ndarray):
+		"""Record an interaction of all rays, at their current position and direction.
+
+		Parameters:
+		-----------
+		system: int or np.ndarray
+			index of the system touched by all rays, or by each ray
+		"""
+		system = np.broadcast_to(system, (len(self),))
+		self.trail.append((system, self.pos, self.dir, self.n, self.node))
+		self.node = np.arange(len(self))
+
+	def history(self) -> tuple[list[list[np.ndarray]], list[list[Hit]]]:
+		"""Vertices and interactions of the rays since the batch creation.
+
+		Returns:
+		--------
+		vertices: list
+			interaction positions of each ray
+		hits: list
+			interactions (Hit) of each ray
+		"""
+		depth = len(self.trail)
+		vertices = [[None] * depth for _ in range(len(self))]
+		hits = [[None] * depth for _ in range(len(self))]
+		index = self.node
+		for k in range(depth - 1, -1, -1):
+			system, pos, dirs, n, parent = self.trail[k]
+			for i, j in enumerate(index):
+				vertices[i][k] = pos[j]
+				hits[i][k] = Hit(int(system[j]), pos[j], dirs[j], n[j])
+			index = parent[index]
+		return vertices, hits
@@ -0,0 +1,195 @@
+import os
+import json
+import numpy as np
+
+import raysim.photon as ph
+import raysim.geometry as geo
+import raysim.systems as sy
+import raysim.optics as opt
+from raysim.source import Source
+from raysim.budget import Budget
+from raysim.simulation import simulate
+
+
+class Scene:
+	"""Scene class.
+	Declarative description of a simulation, read from a JSON scene file:
+
+		{
+			"playground": [-20, -10, 15, 10],
+			"precision": "double",
+			"sources": [{"position": [-10, 0], "wavelength": 650, "power": 1}],
+			"rays": [
+				{"source": 0, "dir": 0.1},
+				{"source": [0, 0], "dir": 1.57, "wavelength": 500, "intensity": 0.5},
+				{"spectral": true, "source": [0, 2], "wavelength": [450, 550, 650]},
+				{"positions": [[0, -1], [0, -2]], "dirs": 0, "wavelengths": 600}
+			],
+			"systems": [
+				{"type": "Mirror", "pos": [0, 0], "height": 10, "rot": 2.356, "reflexion": 0.5},
+				{"type": "Interface", "pos": [5, 0], "height": 4, "n2": "BK7"},
+				{"type": "Detector", "pos": [0, -7], "height": 10, "rot": 1.571}
+			],
+			"simulation": {"dx": 0.01, "max_rays": 20},
+			"budget": {"steps": 1000000, "time": 3600}
+		}
+
+	Sources are indexed by rays, system types are the classes of raysim.systems,
+	string indices are the materials of raysim.optics, simulation holds simulate keyword arguments
+	and budget the resource limits of the simulation.
+	The precision of the scene only applies while it is built and simulated, the precision of the
+	calling thread (geometry.set_precision) is left unchanged.
+
+	Attributes:
+	-----------
+	name: str
+		scene name
+	playground: tuple
+		playground limits
+	precision: str
+		storage precision, see geometry.set_precision
+	sources: list
+		sources
+	rays: list
+		initial rays
+	systems: list
+		systems
+	settings: dict
+		simulate keyword arguments
+	budget: Budget
+		resource limits, None if unlimited
+
+	Methods:
+	--------
+	from_file(path)
+		Read a scene file.
+	simulate(**kwargs)
+		Simulate the scene.
+	"""
+
+	def __init__(self, data: dict, name: str = 'scene'):
+		"""Build a scene from its description, its rays and systems are stored in the precision of the scene.
+
+		Parameters:
+		-----------
+		data: dict
+			scene description
+		name: str, optional (default='scene')
+			scene name
+		"""
+		self.name = data.get('name', name)
+		self.playground = tuple(data['playground'])
+		self.precision = data.get('precision', 'double')
+		with geo.local_precision(self.precision):
+			self.sources = [Source(tuple(s['position']), s.get('wavelength', 650), s.get('power', 1))
+				for s in data.get('sources', [])]
+			self.rays = [p for r in data.get('rays', []) for p in self._rays(r)]
+			self.systems = [self._system(s) for s in data.get('systems', [])]
+		self.settings = dict(data.get('simulation', {}))
+		self.budget = Budget(**data['budget']) if 'budget' in data else None
+
+	def __repr__(self) -> str:
+		return f"Scene(name={self.name}, {len(self.rays)} rays, {len(self.systems)} systems)"
+
+	@classmethod
+	def from_file(cls, path: str) -> 'Scene':
+		"""Read a scene file.
+
+		Parameters:
+		-----------
+		path: str
+			JSON scene file, the scene is named after the file if it has no name
+
+		Returns:
+		--------
+		Scene, scene
+		"""
+		with open(path) as f:
+			data = json.load(f)
+		return cls(data, os.path.splitext(os.path.basename(path))[0])
+
+	def simulate(self, **kwargs) -> list[ph.Photon]:
+		"""Simulate the scene in its precision.
+
+		Parameters:
+		-----------
+		kwargs:
+			simulate keyword arguments, overriding the scene settings
+
+		Returns:
+		--------
+		list, rays
+		"""
+		return simulate(self.rays, self.systems, self.playground, **{**self.settings, 'budget': self.budget, 'precision': self.precision, **kwargs})
+
+	def _source(self, source: int | list) -> Source | tuple[float]:
+		"""Source of a ray, by index or position."""
+		if isinstance(source, int):
+			return self.sources[source]
+		return tuple(source)
+
+	def _rays(self, data: dict) -> list[ph.Photon]:
+		"""Rays of a ray description."""
+		data = dict(data)
+		if 'positions' in data:
+			source = self._source(data.pop('source')) if 'source' in data else None
+			return ph.Photon.from_arrays(data.pop('positions'), data.pop('dirs', 0), data.pop('wavelengths', 650),
+				data.pop('intensities', 1), source, **data)
+		source = self._source(data.pop('source'))
+		if 'pos' in data:
+			data['pos'] = tuple(data['pos'])
+		if data.pop('spectral', False):
+			return [ph.SpectralPhoton(source, **data)]
+		if isinstance(source, Source):
+			data.setdefault('wavelength', source.wavelength)
+		return [ph.Photon(source, **data)]
+
+	def _system(self, data: dict) -> sy.System:
+		"""System of a system description."""
+		data = dict(data)
+		kind = getattr(sy, data.pop('type'), None)
+		if not (isinstance(kind, type) and issubclass(kind, sy.System)):
+			raise ValueError(f"Unknown system type in {data}.")
+		data['pos'] = tuple(data['pos'])
+		for key, value in data.items():
+			if isinstance(value, str) and key in ('n', 'n1', 'n2'):
+				data[key] = getattr(opt, value)					# Material
+		return kind(**data)
+
+
+def save_rays(path: str, rays: list[ph.Photon]):
+	"""Save the trajectories of rays in a compressed npz file.
+	Positions of all rays are concatenated, in the storage precision:
+	the positions of ray i are positions[offsets[i]:offsets[i+1]].
+
+	Parameters:
+	-----------
+	path: str
+		file path
+	rays: list
+		list of rays
+	"""
+	lengths = [len(p.positions) for p in rays]
+	np.savez_compressed(path,
+		positions=np.concatenate([np.asarray(p.positions, dtype=geo.get_dtype())[:, :2] for p in rays]) if rays else np.zeros((0, 2), dtype=geo.get_dtype()),
+		offsets=np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]),
+		wavelength=np.array([np.mean(p.wavelength) for p in rays], dtype=float),
+		intensity=np.array([np.sum(p.intensity) for p in rays], dtype=float),
+		opl=np.array([p.optical_path for p in rays], dtype=float),
+		stopped=np.array([p.stopped for p in rays], dtype=bool)
+	)
+
+def measures(systems: list[sy.System]) -> dict:
+	"""Measures of the instruments of a scene, by system index.
+
+	Parameters:
+	-----------
+	systems: list
+		list of systems
+
+	Returns:
+	--------
+	dict, JSON serializable measures
+	"""
+	return {str(i): {str(key): float(value) for key, value in s.measures.items()}
+		for i, s in enumerate(systems) if isinstance(s, sy.Instrumentation)}
@@ -0,0 +1,155 @@
+import copy
+import warnings
+import numpy as np
+
+import raysim.photon as ph
+import raysim.geometry as geo
+from raysim.systems import System
+from raysim.budget import Budget
+
+
+def compile_sequence(systems: list[System], sequence: list[int]) -> list[int]:
+	"""Compile a sequence of systems into batched stages.
+	The sequence is cut before the first system without batched interaction.
+
+	Parameters:
+	-----------
+	systems: list
+		systems list
+	sequence: list
+		indices of the systems in the order rays reach them
+
+	Returns:
+	--------
+	list, indices of the systems of the stages
+	"""
+	stages = []
+	for i in sequence:
+		if not hasattr(systems[i], 'touched_batch'):
+			break
+		stages.append(i)
+	return stages
+
+def to_photons(batch: ph.RayBatch, systems: list[System], touching: int | np.ndarray = None, end: bool = False) -> list[ph.Photon]:
+	"""Convert a batch into photons.
+
+	Parameters:
+	-----------
+	batch: RayBatch
+		batch of rays
+	systems: list
+		systems list
+	touching: int or np.ndarray, optional (default=None)
+		index of the system the rays are touching, for all rays or for each ray
+	end: bool, optional (default=False)
+		add the current positions to the trajectories
+
+	Returns:
+	--------
+	list, photons
+	"""
+	vertices, hits = batch.history()
+	if touching is not None:
+		touching = np.broadcast_to(touching, (len(batch),))
+	photons = []
+	for i in range(len(batch)):
+		origin = batch.photons[batch.photon[i]]
+		p = copy.copy(origin)
+		p.pos = batch.pos[i]
+		p.dir = float(batch.dir[i])
+		p.intensity = float(batch.intensity[i])
+		p.n = float(batch.n[i])
+		p.opl = float(batch.opl[i])
+		p.vertex = p.pos
+		p.positions = origin.positions + vertices[i] + ([p.pos] if end else [])
+		p.path = origin.path + hits[i]
+		p.stopped = bool(batch.stopped[i])
+		p.touching = systems[touching[i]] if touching is not None else origin.touching
+		photons.append(p)
+	return photons
+
+def trace(photons: list[ph.Photon], systems: list[System], playground: tuple, sequence: list[int] | str,
+	max_rays: int = None, budget: Budget = None) -> list[ph.Photon]:
+	"""Trace photons through a sequence of systems.
+	Each stage intersects the whole batch with every system: rays whose nearest system is the
+	next stage interact with it in a single batched call, rays leaving the playground are finished
+	and rays reaching another system leave the sequence, to be traced by the stepping engine.
+	The stepping engine is much slower: a warning is issued when rays leave an explicit sequence
+	for a system with a batched interaction, which 'auto' would have kept in the batch.
+
+	Parameters:
+	-----------
+	photons: list
+		list of photons
+	systems: list
+		systems list
+	playground: tuple
+		playground limits
+	sequence: list or 'auto'
+		indices of the systems in the order rays reach them - with 'auto', each stage
+		sends every ray to its nearest system, as long as it has a batched interaction
+	max_rays: int, optional (default=None)
+		stop the stages once this number of spawned rays is exceeded, remaining rays leave the sequence -
+		the initial photons are not counted
+	budget: Budget, optional (default=None)
+		resource limits, each ray of a stage is a step - remaining rays leave the sequence once one is reached
+
+	Returns:
+	--------
+	list, photons - stopped if finished, at their last interaction otherwise
+	"""
+	batched = np.array([hasattr(s, 'touched_batch') for s in systems] + [False])
+	if sequence != 'auto':
+		stages = compile_sequence(systems, sequence)
+	batchable = [not p.stopped and not isinstance(p, ph.SpectralPhoton) for p in photons]
+	rays = [p for p, b in zip(photons, batchable) if not b]			# Spectral photons are left to the stepping engine
+	batch = ph.RayBatch.from_photons([p for p, b in zip(photons, batchable) if b])
+	last = None												# Last system touched by each ray
+	initial = len(photons)
+	missed = 0												# Batchable rays leaving the sequence
+	k = 0
+
+	while len(batch):
+		t = np.stack([s.intersect(batch.pos, batch.dir) for s in systems])
+		nearest = np.argmin(t, axis=0)
+		t_near = t[nearest, np.arange(len(batch))]
+		t_exit = geo.ray_box_exit(batch.pos, batch.dir, playground)
+
+		exits = t_near >= t_exit								# Rays leaving the playground
+		if max_rays is not None and len(rays) + len(batch) - initial > max_rays \
+			or budget is not None and budget.charge(len(batch), len(rays) + len(batch), len(batch)):
+			on_path = np.zeros(len(batch), dtype=bool)
+		elif sequence == 'auto':
+			on_path = ~exits & batched[nearest]
+		else:
+			on_path = ~exits & (nearest == (stages[k] if k < len(stages) else -1))
+			missed += int(np.sum(~exits & ~on_path & batched[nearest]))
+		leaving = ~exits & ~on_path								# Rays leaving the sequence
+
+		out = batch.take(exits)
+		out.advance(t_exit[exits])
+		out.stopped[:] = True
+		rays += to_photons(out, systems, None if last is None else last[exits], end=True)
+		rays += to_photons(batch.take(leaving), systems, None if last is None else last[leaving])
+		if not on_path.any():
+			break
+
+		batch = batch.take(on_path)
+		batch.advance(t_near[on_path])
+		batch.record(nearest[on_path])
+		outgoing = []
+		last = []
+		for stage in np.unique(nearest[on_path]):				# One batched call by system
+			outgoing.append(systems[stage].touched_batch(batch.take(nearest[on_path] == stage)))
+			last.append(np.full(len(outgoing[-1]), stage))
+		batch = ph.RayBatch.concat(outgoing)
+		last = np.concatenate(last)
+		rays += to_photons(batch.take(batch.stopped), systems, last[batch.stopped])
+		last = last[~batch.stopped]
+		batch = batch.take(~batch.stopped)
+		k += 1
+
+	if missed:
+		warnings.warn(f"{missed} rays left the sequence for systems with a batched interaction, they are traced "
+			"by the stepping engine - extend the sequence or use sequence='auto'.", stacklevel=3)
+	return rays
@@ -1,15 +1,25 @@
 import numpy as np
-from matplotlib.pyplot import Axes, subplots
 import copy
 import time
+from threading import Event
+from typing import Callable, TYPE_CHECKING
 
 import raysim.photon as ph
 import raysim.geometry as geo
 import raysim.color as col
 from raysim.systems import System, Instrumentation
 import raysim.source as src
+import raysim.sequential as seq
+import raysim.events as ev
+import raysim.cavity as cav
+import raysim.checkpoint as chk
+import raysim.merging as mg
+from raysim.budget import Budget
 
-def simulate(initial_rays: list[ph.Photon], systems: list[System], playground: tuple, dx: float = 0.01, max_iterations: int = 10000, max_rays: int = 20, resimulate: bool = False, print_status: bool = True, print_measures: bool = True, print_stats: bool = True) -> list[ph.Photon]:
+if TYPE_CHECKING:
+	from matplotlib.pyplot import Axes					# matplotlib is only imported to display
+
+def simulate(initial_rays: list[ph.Photon], systems: list[System], playground: tuple, dx: float = 0.01, max_iterations: int = 10000, max_rays: int = 20, resimulate: bool = False, print_status: bool = True, print_measures: bool = True, print_stats: bool = True, cancel: Event = None, progress: Callable[[list[ph.Photon]], None] = None, sequence: list[int] | str = None, engine: str = 'step', horizon: float = None, cavity: float = None, checkpoint: str = None, checkpoint_interval: float = 60, resume: bool = False, budget: Budget = None, merge: float = None, adaptive: bool = False, progress_interval: float = .05, precision: str = None) -> list[ph.Photon]:
 	"""Simulate the rays.
 
 	Parameters:
@@ -34,6 +44,44 @@ def simulate(initial_rays: list[ph.Photon], systems: list[System], playground: t
 		print measures of systems
 	print_stats: bool, optional (default = True)
 		print simulation statistics
+	cancel: threading.Event, optional (default = None)
+		stop the simulation as soon as the event is set, the rays traced so far are returned
+	progress: callable, optional (default = None)
+		called with the list of finished rays when a ray is finished, at most every progress_interval seconds
+	sequence: list or 'auto', optional (default = None)
+		indices of the systems in the order rays reach them, traced by batches before the stepping engine
+		takes over the rays leaving the sequence (much slower, a warning is issued when rays leave it for a
+		batched system) - with 'auto', rays are sent to their nearest system. The batches only count the
+		rays they spawn against max_rays.
+	engine: str, optional (default = 'step')
+		'step' moves rays by dx and detects contacts, 'event' moves rays straight from one interaction
+		to the next in arrival time order
+	horizon: float, optional (default = None)
+		time horizon in seconds of the event engine
+	cavity: float, optional (default = None)
+		position and direction tolerance to detect repeated cavity round trips, whose remaining
+		contributions are then summed as a geometric series - disabled if None
+	checkpoint: str, optional (default = None)
+		checkpoint file, the state of the simulation is periodically saved to it and it is removed once finished
+	checkpoint_interval: float, optional (default = 60)
+		minimal time in seconds between two checkpoints
+	resume: bool, optional (default = False)
+		continue from the checkpoint file if it exists - the scene must be the same
+	budget: Budget, optional (default = None)
+		resource limits, the simulation stops once one is reached and the budget holds the truncation report
+	merge: float, optional (default = None)
+		position and direction tolerance to merge coinciding pending rays into one ray, e.g. after a beam
+		recombination - disabled if None. The stepping engine detects contacts up to .05 before a system,
+		so recombined rays can start about .1 apart and need a larger tolerance (e.g. .15), while the event
+		engine starts them exactly on the surface. Rays finished by the sequence batches are not merged.
+	adaptive: bool, optional (default = False)
+		adapt the step size to the distance to the nearest system (System.distance) and to the playground
+		border: steps are large in empty space and shrink down to dx near surfaces
+	progress_interval: float, optional (default = .05)
+		minimal time in seconds between two progress calls
+	precision: str, optional (default = None)
+		storage precision of the trajectories, 'single' or 'double', for this simulation only
+		(see geometry.set_precision) - the precision of the calling thread if None
 	
 	Returns:
 	--------
@@ -43,31 +91,113 @@ def simulate(initial_rays: list[ph.Photon], systems: list[System], playground: t
 
 	start_time = time.perf_counter()
 	# Simulate rays and calculate interactions
-	rays = copy.deepcopy(initial_rays)
+	store = chk.Checkpoint(checkpoint, systems, checkpoint_interval) if checkpoint is not None else None
+	state = store.load() if store is not None and resume else None
 
 	if print_status and resimulate:
 		print("---")
 		print("⚙️  Resimulating...")
 
-	# Reset systems
-	for s in systems:
-		if isinstance(s, Instrumentation):
-			s.reset()
+	with geo.local_precision(precision, max(abs(v) for v in playground)):
+		for s in systems:
+			if getattr(s, 'hitbox', None) is not None and s.hitbox.dtype != geo.get_dtype():
+				s.hitbox = s.sample()					# Built in another precision
+		if budget is not None:
+			budget.start()
 
-	# Simulate rays
-	for p in rays:
-		p.dx = dx
-		while not p.stopped and len(p.positions) <= max_iterations:
-			p.move()
-			if ph.has_reached_sys(p, systems) and p.touching == None:
-				p.touching = ph.touched_sys(p, systems)
-				p.touching.touched(p, rays = rays)
-			elif not ph.has_reached_sys(p, systems) and p.touching != None:
-				p.touching = None
-			if not geo.is_in(p.pos, playground):
-				p.stopped = True
-		if len(rays) > max_rays:
-			break
+		if state is None:
+			rays = copy.deepcopy(initial_rays)
+
+			# Reset systems
+			for s in systems:
+				if isinstance(s, Instrumentation):
+					s.reset()
+
+			# Trace the sequence by batches
+			if sequence is not None:
+				rays = seq.trace(rays, systems, playground, sequence, max_rays, budget)
+		else:
+			rays = state['rays']							# Resume, instruments are restored
+			if print_status:
+				print(f"⚙️  Resuming from {checkpoint}...")
+
+		# Simulate rays
+		if engine == 'event':
+			rays = ev.propagate(rays, systems, playground, horizon, max_rays, cancel, cavity, store,
+				state if state is not None and state['engine'] == 'event' else None, budget, progress, progress_interval,
+				merge)
+		elif engine != 'step':
+			raise ValueError("Engine must be 'step' or 'event'.")
+		if state is not None and state['engine'] == 'step':
+			start, event, spawned = state['next'], state['event'], state['spawned']
+		else:
+			start = 0
+			event = 0										# Interactions counter
+			spawned = {}									# Rays spawned by each interaction
+		truncated = budget is not None and bool(budget.exhausted)
+		published = time.perf_counter()					# Time of the last progress call
+		i = start										# Next ray, if none is left to trace
+		for i, p in enumerate(rays):
+			if p.stopped or i < start:
+				continue
+			if truncated:
+				break
+			if merge is not None:
+				same = mg.coincident(p, rays, i + 1, merge)
+				if same:
+					mg.combine(p, [rays[j] for j in same])
+					for j in reversed(same):
+						del rays[j]
+			p.dx = dx
+			while not p.stopped and len(p.positions) <= max_iterations:
+				if cancel is not None and cancel.is_set():
+					break
+				if budget is not None and budget.charge(1, len(rays), len(rays) - i):
+					truncated = True
+					break
+				p.move()
+				if adaptive:
+					near = min(float(s.distance(p.pos)) for s in systems) if systems else np.inf
+					border = min(p.pos[0] - playground[0], playground[2] - p.pos[0], p.pos[1] - playground[1], playground[3] - p.pos[1])
+					p.dx = max(dx, min(near - .05 - dx, border + dx))	# Never steps into a contact zone
+					reached = near < .05 and ph.has_reached_sys(p, systems)
+				else:
+					reached = ph.has_reached_sys(p, systems)
+				if reached and p.touching == None:
+					p.touching = ph.touched_sys(p, systems)
+					p.end_segment()
+					hit = ph.Hit(systems.index(p.touching), p.pos, p.dir, p.n, copy.copy(p.intensity), p.opl, event)
+					event += 1
+					j = cav.find_cycle(p, hit, cavity) if cavity is not None else None
+					if j is not None:
+						rays += cav.unroll(p, hit, j, spawned)	# Remaining round trips at once
+					else:
+						p.path.append(hit)
+						n = len(rays)
+						p.touching.touched(p, rays = rays)
+						if cavity is not None and len(rays) > n:
+							spawned[hit.event] = copy.deepcopy(rays[n:])
+				elif not reached and p.touching != None:
+					p.touching = None
+				if not geo.is_in(p.pos, playground):
+					p.stopped = True
+			p.dx = dx
+			if cancel is not None and cancel.is_set():
+				break
+			if progress is not None and time.perf_counter() - published >= progress_interval:
+				progress(rays[:i+1])
+				published = time.perf_counter()
+			if len(rays) > max_rays:
+				break
+			if truncated:
+				break
+			if store is not None and store.due():
+				store.save(engine='step', rays=rays, next=i+1, event=event, spawned=spawned)
+
+		if store is not None and truncated and engine == 'step':
+			store.save(engine='step', rays=rays, next=i, event=event, spawned=spawned)	# Resumable with a new budget
+		elif store is not None and not truncated and not (cancel is not None and cancel.is_set()):
+			store.remove()
 
 	# Print measures
 	if print_measures:
@@ -77,6 +207,8 @@ def simulate(initial_rays: list[ph.Photon], systems: list[System], playground: t
 				s.print_measures()
 				print("----------------")
 
+	if print_status and truncated:
+		budget.print_report()
 	if print_status:
 		if resimulate:
 			print(f"✅ Resimulation calculated in {time.perf_counter() - start_time:.2f}s.")
@@ -89,7 +221,7 @@ def simulate(initial_rays: list[ph.Photon], systems: list[System], playground: t
 	return rays
 
 
-def display(rays: list[ph.Photon], systems: list[any], playground: tuple, sources: list[src.Source] | tuple[float] = None, ax: Axes = None, title: str = None) -> None:
+def display(rays: list[ph.Photon], systems: list[any], playground: tuple, sources: list[src.Source] | tuple[float] = None, ax: 'Axes' = None, title: str = None) -> None:
 	"""Display the simulation.
 
 	Parameters:
@@ -106,21 +238,19 @@ def display(rays: list[ph.Photon], systems: list[any], playground: tuple, source
 		axis
 	"""
 	if ax == None:
+		from matplotlib.pyplot import subplots
 		fig, ax = subplots(num=title)					# Create figure and axis
 	
 	ax.clear()											# Clear axis
 	# Plot rays
 	for p in rays:
 		ax.plot(np.array(p.positions)[:,0], np.array(p.positions)[:,1], 
-			color= col.rbg_to_hex(p.color, p.intensity))	# Plot ray
+			color= col.rbg_to_hex(p.color, min(np.sum(p.intensity), 1)))	# Plot ray
 
 	# Plot systems
 	for s in systems:
-		ax.plot(
-			[s.pos[0] - np.sin(s.rot)*s.height/2, s.pos[0] + np.sin(s.rot)*s.height/2],
-			[s.pos[1] + np.cos(s.rot)*s.height/2, s.pos[1] - np.cos(s.rot)*s.height/2],
-			color = s.color, linestyle = s.style
-		)
+		outline = s.outline()
+		ax.plot(outline[:,0], outline[:,1], color = s.color, linestyle = s.style)
 
 	if sources != None and isinstance(sources, list):
 		sources_pos = np.array([s.position for s in sources])
@@ -1,9 +1,13 @@
 import numpy as np
 import copy
+from typing import Callable
 from json import dumps
 
-from raysim.photon import Photon
+from raysim.photon import Photon, SpectralPhoton, RayBatch
+import raysim.geometry as geo
 import raysim.color as col
+import raysim.optics as opt
+import raysim.constants as const
 
 # ---------------------------------------------------------------------------- #
 #                                    Systems                                   #
@@ -30,6 +34,16 @@ class System:
 		System interaction.
 	move(new_pos, rot=None)
 		Move the system.
+	outline()
+		Points of the system outline.
+	intersect(pos, dirs)
+		Distances from rays to the system.
+	distance(points)
+		Lower bound of the distances from points to the system.
+	normal(points)
+		Normal direction of the system at points.
+	bbox()
+		Bounding box of the system.
 	"""
 
 	def __init__(self, pos: tuple, height: float, rot: float = 0):
@@ -48,10 +62,7 @@ class System:
 		self.height = height
 		self.rot = rot
 		
-		self.hitbox = np.linspace(
-			[self.pos[0] - np.sin(self.rot)*self.height/2, self.pos[1] + np.cos(self.rot)*self.height/2],
-			[self.pos[0] + np.sin(self.rot)*self.height/2, self.pos[1] - np.cos(self.rot)*self.height/2],
-			int(height/.05))
+		self.hitbox = self.sample()
 
 	def __str__(self):
 		return f"{type(self).__name__} at {self.pos}"
@@ -69,10 +80,86 @@ class System:
 		self.pos = new_pos
 		if rot != None:
 			self.rot = rot
-		self.hitbox = np.linspace(
+		self.hitbox = self.sample()
+
+	def sample(self) -> np.ndarray:
+		"""Hitbox points, .05 apart along the system.
+
+		Returns:
+		--------
+		np.ndarray, hitbox points, shape (n, 2)
+		"""
+		return np.linspace(*self.outline(), int(self.height/.05), dtype=geo.get_dtype())
+
+	def outline(self) -> np.ndarray:
+		"""Points of the system outline.
+
+		Returns:
+		--------
+		np.ndarray, outline points, shape (n, 2)
+		"""
+		return np.array([
 			[self.pos[0] - np.sin(self.rot)*self.height/2, self.pos[1] + np.cos(self.rot)*self.height/2],
-			[self.pos[0] + np.sin(self.rot)*self.height/2, self.pos[1] - np.cos(self.rot)*self.height/2],
-			int(self.height/.05))
+			[self.pos[0] + np.sin(self.rot)*self.height/2, self.pos[1] - np.cos(self.rot)*self.height/2]
+		])
+
+	def intersect(self, pos: np.ndarray, dirs: np.ndarray) -> np.ndarray:
+		"""Distances from rays to the system.
+
+		Parameters:
+		-----------
+		pos: np.ndarray
+			ray origins, shape (n, 2)
+		dirs: np.ndarray
+			ray directions in radians
+
+		Returns:
+		--------
+		np.ndarray, distances along the rays, inf where the system is missed
+		"""
+		outline = self.outline()
+		return geo.ray_segment_intersection(pos, dirs, outline[0], outline[-1])
+
+	def distance(self, points: np.ndarray) -> np.ndarray:
+		"""Lower bound of the distances from points to the system, used by adaptive stepping.
+		The bound is the distance to the outline, on which the hitbox lies: systems whose
+		hitbox leaves their outline must override it.
+
+		Parameters:
+		-----------
+		points: np.ndarray
+			points, shape (2,) or (n, 2)
+
+		Returns:
+		--------
+		np.ndarray, distances
+		"""
+		outline = self.outline()
+		return np.min(geo.segment_distances(points, outline[:-1], outline[1:]), axis=-1)
+
+	def normal(self, points: np.ndarray) -> np.ndarray:
+		"""Normal direction of the system at points.
+
+		Parameters:
+		-----------
+		points: np.ndarray
+			points on or near the system, shape (2,) or (n, 2)
+
+		Returns:
+		--------
+		np.ndarray, normal directions in radians
+		"""
+		return np.full(np.shape(points)[:-1], self.rot, dtype=float)
+
+	def bbox(self) -> tuple[float]:
+		"""Bounding box of the system.
+
+		Returns:
+		--------
+		tuple, box (xmin, ymin, xmax, ymax)
+		"""
+		outline = self.outline()
+		return (*np.min(outline, axis=0).tolist(), *np.max(outline, axis=0).tolist())
 
 class Mirror(System):
 	"""Mirror class.
@@ -148,14 +235,36 @@ class Mirror(System):
 			reflected = copy.deepcopy(photon)
 			reflected.positions = [photon.pos]
 			reflected.intensity *= self.reflexion
-			reflected.dir = np.pi + 2 * self.rot - photon.dir
+			reflected.dir = np.pi + 2 * float(self.normal(photon.pos)) - photon.dir
 			rays.append(reflected)
 			
 			photon.stopped = True
 		else:
-			photon.dir = np.pi + 2 * self.rot - photon.dir
+			photon.dir = np.pi + 2 * float(self.normal(photon.pos)) - photon.dir
 			photon.intensity *= self.reflexion
 
+	def touched_batch(self, batch: RayBatch) -> RayBatch:
+		"""Batched mirror interaction.
+		Rays are reflected, and transmitted if the mirror is partially reflecting.
+
+		Parameters:
+		-----------
+		batch: RayBatch
+			incident rays
+
+		Returns:
+		--------
+		RayBatch, transmitted then reflected rays
+		"""
+		reflected = batch.copy()
+		reflected.dir = np.pi + 2 * self.normal(batch.pos) - batch.dir
+		reflected.intensity = batch.intensity * self.reflexion
+		if self.reflexion == 1:
+			return reflected
+		through = batch.copy()
+		through.intensity = batch.intensity * (1 - self.reflexion)
+		return RayBatch.concat([through, reflected])
+
 class Screen(System):
 	"""Screen class.
 	Photons are stopped by the screen.
@@ -214,6 +323,18 @@ class Screen(System):
 		"""
 		photon.stopped = True
 
+	def touched_batch(self, batch: RayBatch) -> RayBatch:
+		"""Batched screen interaction.
+		Rays are stopped.
+
+		Parameters:
+		-----------
+		batch: RayBatch
+			incident rays
+		"""
+		batch.stopped[:] = True
+		return batch
+
 
 class Filter(System):
 	"""Filter class.
@@ -283,8 +404,428 @@ class Filter(System):
 		photon: Photon
 			photon object
 		"""
-		if abs(photon.wavelength - self.wavelength) > self.bandwidth/2:
+		if isinstance(photon, SpectralPhoton):
+			photon.select(np.abs(photon.wavelength - self.wavelength) <= self.bandwidth/2)	# Band mask
+			if len(photon.wavelength) == 0:
+				photon.stopped = True
+		elif abs(photon.wavelength - self.wavelength) > self.bandwidth/2:
+			photon.stopped = True
+
+	def touched_batch(self, batch: RayBatch) -> RayBatch:
+		"""Batched filter interaction.
+		Rays out of the band are stopped.
+
+		Parameters:
+		-----------
+		batch: RayBatch
+			incident rays
+		"""
+		batch.stopped |= np.abs(batch.wavelength - self.wavelength) > self.bandwidth/2
+		return batch
+
+
+class Interface(System):
+	"""Interface class.
+	Photons are refracted and partially reflected by the interface between two media.
+
+	Attributes:
+	-----------
+	pos: tuple
+		position
+	height: float
+		height
+	rot: float
+		rotation in radians, the normal points from medium n1 to medium n2
+	color: str
+		color
+	line style: str
+		line style
+	n1: float or callable
+		refractive index behind the interface, constant or dispersion law
+	n2: float or callable
+		refractive index in front of the interface, constant or dispersion law
+	fresnel: bool
+		split reflected and transmitted photons
+	hitbox: np.ndarray
+		hitbox
+
+	Methods:
+	--------
+	interact(dirs, wavelengths, pos=None)
+		Batched interface interaction.
+	touched(photon)
+		Interface interaction.
+	move(new_pos, rot=None)
+		Move the interface.
+	"""
+
+	def __init__(self, pos: tuple, height: float, rot: float = 0,
+		n1: float | Callable = 1, n2: float | Callable = opt.BK7, fresnel: bool = True):
+		"""Initialize an interface object.
+
+		Parameters:
+		-----------
+		pos: tuple
+			position
+		height: float
+			height
+		rot: float, optional (default=0)
+			rotation in radians, the normal points from medium n1 to medium n2
+		n1: float or callable, optional (default=1)
+			refractive index behind the interface, constant or dispersion law
+		n2: float or callable, optional (default=optics.BK7)
+			refractive index in front of the interface, constant or dispersion law
+		fresnel: bool, optional (default=True)
+			split reflected and transmitted photons - otherwise only the transmitted photon is kept
+		"""
+		super().__init__(pos, height, rot)
+
+		self.color = '#5fa8d3'
+		self.style = '-'
+
+		self.n1 = n1
+		self.n2 = n2
+		self.fresnel = fresnel
+
+	def __repr__(self) -> str:
+		return f"Interface(pos={self.pos}, height={self.height}, rot={self.rot}, n1={self.n1}, n2={self.n2}, fresnel={self.fresnel})"
+
+	def interact(self, dirs: np.ndarray, wavelengths: np.ndarray, pos: np.ndarray = None) -> tuple[np.ndarray]:
+		"""Batched interface interaction.
+
+		Parameters:
+		-----------
+		dirs: np.ndarray
+			incident directions in radians
+		wavelengths: np.ndarray
+			wavelengths in nm
+		pos: np.ndarray, optional (default=None)
+			interaction positions, for the local normal - the interface rotation if None
+
+		Returns:
+		--------
+		reflected, transmitted, R, n_out: np.ndarray
+			see optics.refract
+		"""
+		normal = self.rot if pos is None else self.normal(pos)
+		return opt.refract(dirs, normal, opt.index(self.n1, wavelengths), opt.index(self.n2, wavelengths))
+
+	def touched(self, photon: Photon, rays: list[Photon]):
+		"""Interface interaction.
+		Photon is refracted, and reflected following Fresnel coefficients.
+
+		Parameters:
+		-----------
+		photon: Photon
+			photon object
+		rays: list
+			list of rays
+		"""
+		if isinstance(photon, SpectralPhoton):
+			self._touched_spectral(photon, rays)
+			return
+
+		reflected, transmitted, R, n_out = self.interact(np.array([photon.dir]), np.array([photon.wavelength]), np.array([photon.pos], dtype=float))
+		reflected, transmitted, R, n_out = reflected[0], transmitted[0], R[0], n_out[0]
+
+		if np.isnan(transmitted):									# Total internal reflection
+			photon.dir = reflected
+		elif self.fresnel:
+			through = copy.deepcopy(photon)
+			through.positions = [photon.pos]
+			through.intensity *= 1 - R
+			through.dir = transmitted
+			through.n = n_out
+			rays.append(through)
+
+			back = copy.deepcopy(photon)
+			back.positions = [photon.pos]
+			back.intensity *= R
+			back.dir = reflected
+			rays.append(back)
+
 			photon.stopped = True
+		else:
+			photon.dir = transmitted
+			photon.n = n_out
+			photon.intensity *= 1 - R
+
+	def _touched_spectral(self, photon: SpectralPhoton, rays: list[Photon]):
+		"""Spectral photon interface interaction.
+		Samples are split by transmitted direction, a single photon is transmitted by a non-dispersive interface.
+		"""
+		reflected, transmitted, R, n_out = self.interact(np.full(len(photon.wavelength), photon.dir), photon.wavelength, np.asarray(photon.pos, dtype=float))
+
+		for direction in np.unique(transmitted[~np.isnan(transmitted)]):
+			mask = transmitted == direction
+			through = copy.deepcopy(photon).select(mask)
+			through.positions = [photon.pos]
+			through.intensity *= 1 - R[mask]
+			through.dir = direction
+			through.n = n_out[mask][0]
+			rays.append(through)
+
+		mask = np.ones(len(R), dtype=bool) if self.fresnel else np.isnan(transmitted)
+		if mask.any():
+			back = copy.deepcopy(photon).select(mask)
+			back.positions = [photon.pos]
+			back.intensity *= R[mask]
+			back.dir = reflected[0]
+			rays.append(back)
+
+		photon.stopped = True
+
+	def touched_batch(self, batch: RayBatch) -> RayBatch:
+		"""Batched interface interaction.
+		Rays are refracted, and reflected following Fresnel coefficients.
+
+		Parameters:
+		-----------
+		batch: RayBatch
+			incident rays
+
+		Returns:
+		--------
+		RayBatch, transmitted then reflected rays
+		"""
+		reflected, transmitted, R, n_out = self.interact(batch.dir, batch.wavelength, batch.pos)
+		tir = np.isnan(transmitted)
+
+		through = batch.take(~tir)
+		through.dir = transmitted[~tir]
+		through.n = n_out[~tir]
+		through.intensity = through.intensity * (1 - R[~tir])
+
+		back = batch.copy() if self.fresnel else batch.take(tir)
+		back.dir = reflected if self.fresnel else reflected[tir]
+		back.intensity = back.intensity * (R if self.fresnel else R[tir])
+		return RayBatch.concat([through, back])
+
+
+class Curved:
+	"""Curved surface mixin.
+	The surface is described analytically in the frame of its vertex: u along the axis (rot),
+	v along the aperture, u = sag(v) for |v| <= height/2. Spherical surfaces have a signed radius,
+	positive when the center of curvature is in front of the vertex (along rot), parabolic surfaces a signed focal length.
+	Intersections are solved in closed form, rays missing the bounding box are culled first.
+
+	Attributes:
+	-----------
+	radius: float
+		radius of curvature of a spherical surface, None if parabolic
+	focal: float
+		focal length of a parabolic surface, None if spherical
+
+	Methods:
+	--------
+	sag(v)
+		Surface depth along the axis.
+	slope(v)
+		Surface slope dsag/dv.
+	"""
+
+	def __init__(self, pos: tuple, height: float, rot: float = 0, radius: float = None, focal: float = None, **kwargs):
+		"""Initialize a curved system.
+
+		Parameters:
+		-----------
+		pos: tuple
+			vertex position
+		height: float
+			aperture
+		rot: float, optional (default=0)
+			axis direction in radians
+		radius: float, optional (default=None)
+			radius of curvature of a spherical surface
+		focal: float, optional (default=None)
+			focal length of a parabolic surface, used if radius is None
+		kwargs:
+			keyword arguments of the system
+		"""
+		if (radius is None) == (focal is None):
+			raise ValueError("Either radius or focal must be given.")
+		if radius is not None and height / 2 > abs(radius):
+			raise ValueError("Aperture must not exceed the sphere diameter.")
+		self.radius = radius
+		self.focal = focal
+		super().__init__(pos, height, rot, **kwargs)
+
+	def sag(self, v: np.ndarray) -> np.ndarray:
+		"""Surface depth along the axis.
+
+		Parameters:
+		-----------
+		v: np.ndarray
+			aperture coordinates
+
+		Returns:
+		--------
+		np.ndarray, depths
+		"""
+		if self.radius is None:
+			return v ** 2 / (4 * self.focal)
+		c = 1 / self.radius
+		return c * v ** 2 / (1 + np.sqrt(np.maximum(1 - (c * v) ** 2, 0)))
+
+	def slope(self, v: np.ndarray) -> np.ndarray:
+		"""Surface slope dsag/dv.
+
+		Parameters:
+		-----------
+		v: np.ndarray
+			aperture coordinates
+
+		Returns:
+		--------
+		np.ndarray, slopes
+		"""
+		if self.radius is None:
+			return v / (2 * self.focal)
+		c = 1 / self.radius
+		return c * v / np.sqrt(np.maximum(1 - (c * v) ** 2, 1e-12))
+
+	def _frame(self, points: np.ndarray) -> tuple[np.ndarray]:
+		"""Coordinates (u, v) of points in the vertex frame."""
+		d = np.asarray(points, dtype=float) - np.asarray(self.pos, dtype=float)
+		c, s = np.cos(self.rot), np.sin(self.rot)
+		return d[..., 0] * c + d[..., 1] * s, -d[..., 0] * s + d[..., 1] * c
+
+	def outline(self) -> np.ndarray:
+		"""Points of the surface, from v = height/2 to v = -height/2.
+
+		Returns:
+		--------
+		np.ndarray, outline points, shape (65, 2)
+		"""
+		v = np.linspace(self.height / 2, -self.height / 2, 65)
+		u = self.sag(v)
+		c, s = np.cos(self.rot), np.sin(self.rot)
+		return np.stack([self.pos[0] + u * c - v * s, self.pos[1] + u * s + v * c], axis=-1)
+
+	def sample(self) -> np.ndarray:
+		"""Hitbox points, about .05 apart along the surface."""
+		outline = self.outline()
+		length = np.sum(geo.distances(outline[1:], outline[:-1]))
+		v = np.linspace(self.height / 2, -self.height / 2, max(2, int(length / .05)))
+		u = self.sag(v)
+		c, s = np.cos(self.rot), np.sin(self.rot)
+		return np.stack([self.pos[0] + u * c - v * s, self.pos[1] + u * s + v * c], axis=-1).astype(geo.get_dtype())
+
+	def intersect(self, pos: np.ndarray, dirs: np.ndarray) -> np.ndarray:
+		"""Distances from rays to the surface, in closed form.
+
+		Parameters:
+		-----------
+		pos: np.ndarray
+			ray origins, shape (n, 2)
+		dirs: np.ndarray
+			ray directions in radians
+
+		Returns:
+		--------
+		np.ndarray, distances along the rays, inf where the surface is missed
+		"""
+		pos = np.asarray(pos, dtype=float).reshape(-1, 2)
+		dirs = np.broadcast_to(np.asarray(dirs, dtype=float), (len(pos),))
+		t = np.full(len(pos), np.inf)
+		near = geo.ray_box_hit(pos, dirs, self.bbox())					# Culling
+		if not near.any():
+			return t
+		u0, v0 = self._frame(pos[near])
+		du, dv = np.cos(dirs[near] - self.rot), np.sin(dirs[near] - self.rot)
+
+		if self.radius is None:											# a v^2 - u = 0
+			a = 1 / (4 * self.focal)
+			A, B, C = a * dv ** 2, 2 * a * v0 * dv - du, a * v0 ** 2 - u0
+		else:															# (u - R)^2 + v^2 = R^2
+			R = self.radius
+			A, B, C = np.ones_like(du), 2 * ((u0 - R) * du + v0 * dv), (u0 - R) ** 2 + v0 ** 2 - R ** 2
+		with np.errstate(divide='ignore', invalid='ignore'):
+			root = np.sqrt(B ** 2 - 4 * A * C)
+			linear = np.abs(A) < 1e-12
+			q = -(B + np.copysign(root, B)) / 2							# Stable roots
+			roots = np.stack([np.where(linear, -C / B, q / A), np.where(linear, np.inf, C / q)])
+
+		best = np.full(len(u0), np.inf)
+		for r in roots:
+			v = v0 + r * dv
+			valid = np.isfinite(r) & (r > geo.get_epsilon()) & (np.abs(v) <= self.height / 2)	# Ignore roots at the ray origin
+			if self.radius is not None:
+				valid &= (u0 + r * du) * self.radius < self.radius ** 2		# Branch of the vertex
+			best = np.where(valid & (r < best), r, best)
+		t[near] = best
+		return t
+
+	def distance(self, points: np.ndarray) -> np.ndarray:
+		"""Lower bound of the distances from points to the surface.
+
+		Parameters:
+		-----------
+		points: np.ndarray
+			points, shape (2,) or (n, 2)
+
+		Returns:
+		--------
+		np.ndarray, distances
+		"""
+		if self.radius is not None:										# Distance to the whole circle
+			u, v = self._frame(points)
+			return np.abs(np.hypot(u - self.radius, v) - abs(self.radius))
+		outline = self.outline()
+		step = self.height / (len(outline) - 1)
+		chord = step ** 2 / (16 * abs(self.focal))						# Largest gap between the parabola and its chords
+		return np.maximum(np.min(geo.segment_distances(points, outline[:-1], outline[1:]), axis=-1) - chord, 0)
+
+	def normal(self, points: np.ndarray) -> np.ndarray:
+		"""Normal direction of the surface at points, oriented like the axis.
+
+		Parameters:
+		-----------
+		points: np.ndarray
+			points on or near the surface, shape (2,) or (n, 2)
+
+		Returns:
+		--------
+		np.ndarray, normal directions in radians
+		"""
+		v = np.clip(self._frame(points)[1], -self.height / 2, self.height / 2)
+		return self.rot - np.arctan(self.slope(v))
+
+
+class CurvedMirror(Curved, Mirror):
+	"""Curved mirror class.
+	Spherical or parabolic mirror, photons are reflected about the local normal.
+	A positive radius or focal length makes the mirror concave on the side its axis (rot) points to.
+
+	Attributes:
+	-----------
+	see Curved and Mirror
+
+	Methods:
+	--------
+	see Curved and Mirror
+	"""
+
+	def __repr__(self) -> str:
+		return f"CurvedMirror(pos={self.pos}, height={self.height}, rot={self.rot}, radius={self.radius}, focal={self.focal}, reflexion={self.reflexion})"
+
+
+class CurvedInterface(Curved, Interface):
+	"""Curved interface class.
+	Spherical or parabolic surface between two media, e.g. a lens face:
+	photons are refracted about the local normal, which points from medium n1 to medium n2.
+
+	Attributes:
+	-----------
+	see Curved and Interface
+
+	Methods:
+	--------
+	see Curved and Interface
+	"""
+
+	def __repr__(self) -> str:
+		return f"CurvedInterface(pos={self.pos}, height={self.height}, rot={self.rot}, radius={self.radius}, focal={self.focal}, n1={self.n1}, n2={self.n2})"
 
 
 # ---------------------------------------------------------------------------- #
@@ -316,9 +857,15 @@ class Instrumentation(System):
 		Instrumentation interaction.
 	move(new_pos, rot=None)
 		Move the instrumentation.
+	get_state()
+		Accumulated state of the instrumentation.
+	set_state(state)
+		Restore an accumulated state.
 	
 	"""
 
+	state = ('measures',)									# Attributes accumulated during a simulation
+
 	def __init__(self, pos: tuple, height: float, rot: float = 0, passive: bool = True):
 		"""Initialize an instrumentation object."""
 		super().__init__(pos, height, rot)
@@ -335,10 +882,32 @@ class Instrumentation(System):
 		"""Reset the instrumentation."""
 		self.measures = {}
 
+	def get_state(self) -> dict:
+		"""Accumulated state of the instrumentation, to checkpoint a simulation.
+
+		Returns:
+		--------
+		dict, accumulated attributes
+		"""
+		return {name: getattr(self, name) for name in self.state}
+
+	def set_state(self, state: dict):
+		"""Restore an accumulated state.
+
+		Parameters:
+		-----------
+		state: dict
+			accumulated attributes, see get_state
+		"""
+		for name in self.state:
+			setattr(self, name, state[name])
+
 
 class Spectrometer(Instrumentation):
 	"""Spectrometer class.
 	Photons wavelength is measured by the spectrometer.
+	Binned spectrometers accumulate intensities in a fixed array of wavelength bins, optionally
+	resolved along the spectrometer: their memory does not depend on the number of detected photons.
 
 	Attributes:
 	-----------
@@ -353,23 +922,34 @@ class Spectrometer(Instrumentation):
 	line style: str
 		line style
 	measures: dict
-		measures
+		intensity by wavelength, by bin center for binned spectrometers (empty bins are omitted)
 	hitbox: np.ndarray
 		hitbox
 	passive: bool
 		is the spectrometer passive
+	edges: np.ndarray
+		wavelength bins edges in nm, None if not binned
+	spectrum: np.ndarray
+		intensity by bin, shape (bins,) or (positions, bins) - None if not binned
+	outside: float
+		intensity out of the bins range
 
 	Methods:
 	--------
 	touched(photon)
 		Spectrometer interaction.
+	accumulate(wavelengths, intensities, pos=None)
+		Sum intensities by wavelength.
+	merge(other)
+		Add the measures of another spectrometer.
 	move(new_pos, rot=None)
 		Move the spectrometer.
 	reset()
 		Reset the spectrometer.
 	"""
 
-	def __init__(self, pos: tuple, height: float, rot: float = 0, passive: bool = True):
+	def __init__(self, pos: tuple, height: float, rot: float = 0, passive: bool = True, bins: int = None,
+		resolution: float = None, wavelength_range: tuple[float] = (380, 780), positions: int = None):
 		"""Initialize a spectrometer object.
 
 		Parameters:
@@ -382,14 +962,71 @@ class Spectrometer(Instrumentation):
 			rotation in radians
 		passive: bool, optional (default=True)
 			is the spectrometer passive
+		bins: int, optional (default=None)
+			number of wavelength bins
+		resolution: float, optional (default=None)
+			maximum bins width in nm, used if bins is None: the range is split into as few equal bins as
+			possible - the spectrometer is not binned if both are None
+		wavelength_range: tuple, optional (default=(380, 780))
+			wavelength range of the bins in nm
+		positions: int, optional (default=None)
+			number of position bins along the spectrometer from its first outline point, for position resolved spectra
 		"""
+		if bins is None and resolution is not None:
+			bins = max(1, int(np.ceil((wavelength_range[1] - wavelength_range[0]) / resolution - 1e-9)))	# Exact divisions are not rounded up
+		if bins is not None:
+			self.edges = np.linspace(*wavelength_range, bins + 1)
+		else:
+			self.edges = None
+		self.positions = positions
 		super().__init__(pos, height, rot, passive)
 		
 		self.color = 'black'
 		self.style = '-'
+		self.reset()
 	
+	state = ('_measures', 'spectrum', 'outside')
+
 	def __repr__(self) -> str:
 		return f"Spectrometer(pos={self.pos}, height={self.height}, rot={self.rot}, passive={self.passive})"
+
+	@property
+	def measures(self) -> dict:
+		"""Intensity by wavelength, by bin center for binned spectrometers."""
+		if self.edges is None:
+			return self._measures
+		centers = (self.edges[:-1] + self.edges[1:]) / 2
+		spectrum = self.spectrum if self.positions is None else self.spectrum.sum(axis=0)
+		return {c: v for c, v in zip(centers.tolist(), spectrum.tolist()) if v}
+
+	@measures.setter
+	def measures(self, measures: dict):
+		self._measures = measures
+
+	def reset(self):
+		"""Reset the spectrometer."""
+		super().reset()
+		self.outside = 0.
+		if self.edges is None:
+			self.spectrum = None
+		else:
+			bins = len(self.edges) - 1
+			self.spectrum = np.zeros(bins if self.positions is None else (self.positions, bins))
+
+	def print_measures(self):
+		"""Print measures, summarized for binned spectrometers."""
+		if self.edges is None:
+			return super().print_measures()
+		spectrum = self.spectrum if self.positions is None else self.spectrum.sum(axis=0)
+		peak = int(np.argmax(spectrum))
+		print(f"- {self}:")
+		print(dumps({
+			'bins': len(spectrum),
+			'range': [float(self.edges[0]), float(self.edges[-1])],
+			'total': float(np.sum(spectrum)),
+			'outside': self.outside,
+			'peak': float((self.edges[peak] + self.edges[peak + 1]) / 2) if np.any(spectrum) else None
+		}, indent=4))
 		
 	def touched(self, photon: Photon, rays: list = None):
 		"""Spectrometer interaction.
@@ -400,8 +1037,291 @@ class Spectrometer(Instrumentation):
 		photon: Photon
 			photon object
 		"""
-		if photon.wavelength not in self.measures:
-			self.measures[photon.wavelength] = 0
-		self.measures[photon.wavelength] += photon.intensity
+		if isinstance(photon, SpectralPhoton) or self.edges is not None:
+			self.accumulate(np.atleast_1d(photon.wavelength), np.atleast_1d(photon.intensity), photon.pos)
+		else:
+			if photon.wavelength not in self.measures:
+				self.measures[photon.wavelength] = 0
+			self.measures[photon.wavelength] += photon.intensity
+		if not self.passive:
+			photon.stopped = True
+
+	def accumulate(self, wavelengths: np.ndarray, intensities: np.ndarray, pos: np.ndarray = None):
+		"""Sum intensities by wavelength.
+
+		Parameters:
+		-----------
+		wavelengths: np.ndarray
+			wavelengths in nm
+		intensities: np.ndarray
+			intensities
+		pos: np.ndarray, optional (default=None)
+			positions of the photons, shape (2,) or (n, 2) - used by position resolved spectrometers
+		"""
+		if self.edges is not None:
+			bins = len(self.edges) - 1
+			index = np.searchsorted(self.edges, wavelengths, side='right') - 1
+			index[wavelengths == self.edges[-1]] = bins - 1				# Last bin includes its upper edge
+			valid = (index >= 0) & (index < bins)
+			if self.positions is not None:
+				a, b = self.outline()
+				u = np.einsum('...i,i', np.asarray(pos, dtype=float) - a, b - a) / np.sum((b - a) ** 2)
+				row = np.clip((u * self.positions).astype(int), 0, self.positions - 1)
+				index = index + np.broadcast_to(row, index.shape) * bins
+			self.spectrum += np.bincount(index[valid], weights=intensities[valid],
+				minlength=self.spectrum.size).reshape(self.spectrum.shape)
+			self.outside += float(np.sum(intensities[~valid]))
+			return
+		wavelengths, groups = np.unique(wavelengths, return_inverse=True)
+		sums = np.bincount(groups, weights=intensities, minlength=len(wavelengths))
+		for wavelength, intensity in zip(wavelengths.tolist(), sums.tolist()):
+			self.measures[wavelength] = self.measures.get(wavelength, 0) + intensity
+
+	def touched_batch(self, batch: RayBatch) -> RayBatch:
+		"""Batched spectrometer interaction.
+		Rays intensities are summed by wavelength.
+
+		Parameters:
+		-----------
+		batch: RayBatch
+			incident rays
+		"""
+		self.accumulate(batch.wavelength, batch.intensity, batch.pos)
+		if not self.passive:
+			batch.stopped[:] = True
+		return batch
+
+	def merge(self, other: 'Spectrometer'):
+		"""Add the measures of another spectrometer, e.g. of a parallel worker.
+
+		Parameters:
+		-----------
+		other: Spectrometer
+			spectrometer with the same bins
+		"""
+		if self.edges is not None:
+			if other.edges is None or not np.array_equal(self.edges, other.edges) or self.spectrum.shape != other.spectrum.shape:
+				raise ValueError("Spectrometers must have the same bins.")
+			self.spectrum += other.spectrum
+			self.outside += other.outside
+		else:
+			for wavelength, intensity in other.measures.items():
+				self.measures[wavelength] = self.measures.get(wavelength, 0) + intensity
+
+
+class Detector(Instrumentation):
+	"""Detector class.
+	Photons are coherently summed by the detector, giving the interference intensity.
+
+	Attributes:
+	-----------
+	pos: tuple
+		position
+	height: float
+		height
+	rot: float
+		rotation in radians
+	color: str
+		color
+	line style: str
+		line style
+	measures: dict
+		interference intensity by wavelength
+	contributions: dict
+		wavelengths, intensities, optical paths and interactions of detected photons
+	fields: dict
+		complex field by wavelength, updated as photons are detected
+	hitbox: np.ndarray
+		hitbox
+	passive: bool
+		is the detector passive
+
+	Methods:
+	--------
+	touched(photon)
+		Detector interaction.
+	detect(wavelengths, intensities, opl, paths, series)
+		Store contributions and update their fields.
+	intensity(shift=None)
+		Interference intensity for optical path shifts.
+	fringes(system, displacements)
+		Interference intensity for translations of a system.
+	move(new_pos, rot=None)
+		Move the detector.
+	reset()
+		Reset the detector.
+	"""
+
+	def __init__(self, pos: tuple, height: float, rot: float = 0, passive: bool = False):
+		"""Initialize a detector object.
+
+		Parameters:
+		-----------
+		pos: tuple
+			position
+		height: float
+			height
+		rot: float, optional (default=0)
+			rotation in radians
+		passive: bool, optional (default=False)
+			is the detector passive
+		"""
+		super().__init__(pos, height, rot, passive)
+
+		self.color = 'black'
+		self.style = 'dotted'
+		self.reset()
+
+	state = ('measures', 'contributions', 'fields')
+
+	def __repr__(self) -> str:
+		return f"Detector(pos={self.pos}, height={self.height}, rot={self.rot}, passive={self.passive})"
+
+	def reset(self):
+		"""Reset the detector."""
+		super().reset()
+		self.contributions = {'wavelength': [], 'intensity': [], 'opl': [], 'path': [], 'series': []}
+		self.fields = {}
+
+	def touched(self, photon: Photon, rays: list = None):
+		"""Detector interaction.
+		Photon complex amplitude is added to the field of its wavelength, each ray merged into the photon separately.
+
+		Parameters:
+		-----------
+		photon: Photon
+			photon object
+		"""
+		if photon.components is not None:
+			components = photon.components
+			self.detect([photon.wavelength] * len(components), [photon.intensity * c.weight for c in components],
+				[photon.opl + c.opl for c in components], [c.path + photon.path[c.start:] for c in components],
+				[c.series for c in components])
+		else:
+			wavelengths = np.atleast_1d(photon.wavelength).tolist()
+			self.detect(wavelengths, np.broadcast_to(photon.intensity, len(wavelengths)).tolist(), [photon.opl] * len(wavelengths),
+				[list(photon.path)] * len(wavelengths), [photon.series] * len(wavelengths))
 		if not self.passive:
-			photon.stopped = True
\ No newline at end of file
+			photon.stopped = True
+
+	def touched_batch(self, batch: RayBatch) -> RayBatch:
+		"""Batched detector interaction.
+
+		Parameters:
+		-----------
+		batch: RayBatch
+			incident rays
+		"""
+		hits = batch.history()[1]
+		self.detect(batch.wavelength.tolist(), batch.intensity.tolist(), batch.opl.tolist(),
+			[batch.photons[i].path + h for i, h in zip(batch.photon, hits)], [None] * len(batch))
+		if not self.passive:
+			batch.stopped[:] = True
+		return batch
+
+	def detect(self, wavelengths: list, intensities: list, opl: list, paths: list, series: list):
+		"""Store contributions and add their amplitudes to the fields of their wavelengths.
+		Only the touched wavelengths are updated, the cost does not depend on the stored contributions.
+
+		Parameters:
+		-----------
+		wavelengths: list
+			wavelengths in nm
+		intensities: list
+			intensities
+		opl: list
+			optical path lengths
+		paths: list
+			interactions of the contributions
+		series: list
+			cavity series of the contributions, None without series
+		"""
+		for key, values in zip(('wavelength', 'intensity', 'opl', 'path', 'series'), (wavelengths, intensities, opl, paths, series)):
+			self.contributions[key].extend(values)
+		for wavelength, amplitude in zip(wavelengths, self.amplitudes(wavelengths, intensities, opl, series).tolist()):
+			self.fields[wavelength] = self.fields.get(wavelength, 0) + amplitude
+		for wavelength in dict.fromkeys(wavelengths):
+			self.measures[wavelength] = abs(self.fields[wavelength]) ** 2
+
+	@staticmethod
+	def amplitudes(wavelengths: list, intensities: list, opl: np.ndarray, series: list) -> np.ndarray:
+		"""Complex amplitudes of contributions.
+		Contributions standing for cavity round trips sum their geometric series of amplitudes (Airy function).
+
+		Parameters:
+		-----------
+		wavelengths: list
+			wavelengths in nm
+		intensities: list
+			intensities
+		opl: np.ndarray
+			optical path lengths, shape (n,) or (n_shifts, n)
+		series: list
+			cavity series of the contributions, None without series
+
+		Returns:
+		--------
+		np.ndarray, complex amplitudes
+		"""
+		wavelengths = np.array(wavelengths, dtype=float)
+		phase = 2 * np.pi * np.asarray(opl, dtype=float) * const.unit / (wavelengths * 1e-9)
+		amplitude = np.sqrt(np.array(intensities, dtype=float)) * np.exp(1j * phase)
+
+		series = [s if s is not None else (0, 0) for s in series]
+		ratio, length = np.array(series, dtype=float).reshape(-1, 2).T
+		q = np.sqrt(ratio) * np.exp(2j * np.pi * length * const.unit / (wavelengths * 1e-9))
+		return amplitude * np.sqrt(1 - ratio) / (1 - q)					# 1 without series
+
+	def intensity(self, shift: np.ndarray = None) -> dict | np.ndarray:
+		"""Interference intensity, evaluated from all the stored contributions.
+		Contributions of a same wavelength are summed coherently, different wavelengths incoherently.
+
+		Parameters:
+		-----------
+		shift: np.ndarray, optional (default=None)
+			optical path shifts of the contributions, shape (n_contributions,) or (n_shifts, n_contributions)
+
+		Returns:
+		--------
+		dict, intensity by wavelength if shift is None
+		np.ndarray, total intensity for each shift otherwise
+		"""
+		wavelengths = np.array(self.contributions['wavelength'], dtype=float)
+		opl = np.array(self.contributions['opl'], dtype=float)
+		if shift is not None:
+			opl = opl + np.asarray(shift, dtype=float)
+		amplitude = self.amplitudes(wavelengths, self.contributions['intensity'], opl, self.contributions['series'])
+
+		values, groups = np.unique(wavelengths, return_inverse=True)
+		one_hot = np.zeros((len(wavelengths), len(values)))
+		one_hot[np.arange(len(wavelengths)), groups] = 1
+		fields = np.abs(amplitude @ one_hot) ** 2						# Coherent sum by wavelength
+
+		if shift is None:
+			return {wl: fields[..., i] for wl, i in zip(self.contributions['wavelength'], groups)}
+		return np.sum(fields, axis=-1)
+
+	def fringes(self, system: int, displacements: np.ndarray, systems: list[System]) -> np.ndarray:
+		"""Interference intensity for translations of a flat system along its normal.
+		Each reflection on the system shifts the optical path by 2 * n * displacement * cos(incidence),
+		so the whole curve is computed from a single simulation.
+
+		Parameters:
+		-----------
+		system: int
+			index of the translated system
+		displacements: np.ndarray
+			displacements along the system normal, relative to the simulated position
+		systems: list
+			systems list of the simulation
+
+		Returns:
+		--------
+		np.ndarray, total intensity for each displacement
+		"""
+		s = systems[system]
+		factor = np.array([
+			sum(2 * hit.n * np.cos(hit.dir - float(s.normal(np.asarray(hit.pos, dtype=float)))) for hit in path if hit.system == system)
+			for path in self.contributions['path']
+		], dtype=float)
+		return self.intensity(np.outer(displacements, factor))
@@ -0,0 +1,275 @@
+import os
+import copy
+import numpy as np
+from json import dumps
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+
+import raysim.photon as ph
+from raysim.simulation import simulate
+from raysim.systems import System
+
+
+class Tolerance:
+	"""Tolerance class.
+	Random error on a system parameter.
+
+	Attributes:
+	-----------
+	system: int
+		index of the system
+	attribute: str
+		parameter name, 'pos' and 'rot' move the system
+	scale: float or tuple
+		standard deviation (normal) or half width (uniform), by component for tuples
+	distribution: str
+		'normal' or 'uniform'
+	bounds: tuple
+		limits of the perturbed value
+
+	Methods:
+	--------
+	apply(systems, rng)
+		Perturb the parameter.
+	"""
+
+	def __init__(self, system: int, attribute: str, scale: float | tuple[float], distribution: str = 'normal',
+		bounds: tuple[float] = None):
+		"""Initialize a tolerance.
+
+		Parameters:
+		-----------
+		system: int
+			index of the system
+		attribute: str
+			parameter name, 'pos' and 'rot' move the system
+		scale: float or tuple
+			standard deviation (normal) or half width (uniform), by component for tuples
+		distribution: str, optional (default='normal')
+			'normal' or 'uniform'
+		bounds: tuple, optional (default=None)
+			limits of the perturbed value, e.g. (0, 1) for a reflexion coefficient
+		"""
+		if distribution not in ('normal', 'uniform'):
+			raise ValueError("Distribution must be 'normal' or 'uniform'.")
+		self.system = system
+		self.attribute = attribute
+		self.scale = scale
+		self.distribution = distribution
+		self.bounds = bounds
+
+	def __repr__(self) -> str:
+		return f"Tolerance(system={self.system}, attribute={self.attribute}, scale={self.scale}, distribution={self.distribution}, bounds={self.bounds})"
+
+	def apply(self, systems: list[System], rng: np.random.Generator):
+		"""Perturb the parameter.
+
+		Parameters:
+		-----------
+		systems: list
+			systems list, modified in place
+		rng: np.random.Generator
+			random generator
+		"""
+		s = systems[self.system]
+		value = np.asarray(getattr(s, self.attribute), dtype=float)
+		scale = np.broadcast_to(self.scale, value.shape)
+		if self.distribution == 'normal':
+			value = value + rng.normal(0, scale)
+		else:
+			value = value + rng.uniform(-scale, scale)
+		if self.bounds is not None:
+			value = np.clip(value, *self.bounds)
+
+		if self.attribute == 'pos':
+			s.move(tuple(value.tolist()))
+		elif self.attribute == 'rot':
+			s.move(s.pos, float(value))
+		else:
+			setattr(s, self.attribute, value.tolist())
+
+
+class ToleranceResult:
+	"""Running statistics of the measures of an instrument.
+
+	Attributes:
+	-----------
+	samples: int
+		number of samples
+	mean: dict
+		mean of each measure
+	std: dict
+		standard deviation of each measure
+	interval: dict
+		confidence interval half width of each measure
+	confidence: float
+		confidence level
+	converged: bool
+		the requested interval width has been reached
+
+	Methods:
+	--------
+	add(measures)
+		Add a sample.
+	print_measures()
+		Print the statistics.
+	"""
+
+	def __init__(self, confidence: float = .95):
+		"""Initialize empty statistics.
+
+		Parameters:
+		-----------
+		confidence: float, optional (default=.95)
+			confidence level
+		"""
+		self.confidence = confidence
+		self.samples = 0
+		self.mean = {}
+		self.converged = False
+		self._m2 = {}
+		self._z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+	def add(self, measures: dict):
+		"""Add a sample (Welford's algorithm), missing measures count as 0.
+
+		Parameters:
+		-----------
+		measures: dict
+			measures of the instrument
+		"""
+		for key in measures:
+			if key not in self.mean:
+				self.mean[key] = 0.
+				self._m2[key] = 0.
+		self.samples += 1
+		for key in self.mean:
+			delta = measures.get(key, 0) - self.mean[key]
+			self.mean[key] += delta / self.samples
+			self._m2[key] += delta * (measures.get(key, 0) - self.mean[key])
+
+	@property
+	def std(self) -> dict:
+		"""Standard deviation of each measure."""
+		if self.samples < 2:
+			return {key: float('inf') for key in self.mean}
+		return {key: (m2 / (self.samples - 1)) ** .5 for key, m2 in self._m2.items()}
+
+	@property
+	def interval(self) -> dict:
+		"""Confidence interval half width of each measure."""
+		return {key: self._z * std / self.samples ** .5 for key, std in self.std.items()}
+
+	def print_measures(self):
+		"""Print the statistics."""
+		print(f"- {self.samples} samples, {self.confidence:.0%} confidence{'' if self.converged else ' (not converged)'}:")
+		print(dumps({str(key): {'mean': self.mean[key], 'std': self.std[key], 'interval': self.interval[key]}
+			for key in self.mean}, indent=4))
+
+
+def sample(initial_rays: list[ph.Photon], systems: list[System], playground: tuple, tolerances: list[Tolerance],
+	instrument: int, seed: np.random.SeedSequence, kwargs: dict) -> dict:
+	"""Simulate one perturbed scene.
+
+	Parameters:
+	-----------
+	initial_rays: list
+		list of rays
+	systems: list
+		list of systems, not modified
+	playground: tuple
+		playground limits
+	tolerances: list
+		list of tolerances
+	instrument: int
+		index of the measured instrument
+	seed: np.random.SeedSequence
+		seed of the sample
+	kwargs: dict
+		simulate keyword arguments
+
+	Returns:
+	--------
+	dict, measures of the instrument
+	"""
+	rng = np.random.default_rng(seed)
+	systems = copy.deepcopy(systems)
+	for t in tolerances:
+		t.apply(systems, rng)
+	simulate(initial_rays, systems, playground, print_status=False, print_measures=False, print_stats=False, **kwargs)
+	return dict(systems[instrument].measures)
+
+def analyze(initial_rays: list[ph.Photon], systems: list[System], playground: tuple, tolerances: list[Tolerance],
+	instrument: int, width: float = None, confidence: float = .95, min_samples: int = 10, max_samples: int = 1000,
+	seed: int = None, processes: int = None, print_status: bool = True, **kwargs) -> ToleranceResult:
+	"""Monte Carlo tolerance analysis.
+	Perturbed scenes are simulated across a process pool and their measures streamed into
+	running statistics, until every confidence interval is narrower than width.
+	Samples are seeded and processed in order: results only depend on seed, not on processes.
+
+	Parameters:
+	-----------
+	initial_rays: list
+		list of rays
+	systems: list
+		list of systems, not modified
+	playground: tuple
+		playground limits
+	tolerances: list
+		list of tolerances
+	instrument: int
+		index of the measured instrument
+	width: float, optional (default=None)
+		requested confidence interval width, max_samples are drawn if None
+	confidence: float, optional (default=.95)
+		confidence level
+	min_samples: int, optional (default=10)
+		minimum number of samples
+	max_samples: int, optional (default=1000)
+		maximum number of samples
+	seed: int, optional (default=None)
+		random seed
+	processes: int, optional (default=None)
+		number of worker processes, os.cpu_count() if None, no pool if 1
+	print_status: bool, optional (default=True)
+		print status messages
+	kwargs:
+		simulate keyword arguments
+
+	Returns:
+	--------
+	ToleranceResult, statistics of the measures
+	"""
+	result = ToleranceResult(confidence)
+	seeds = np.random.SeedSequence(seed).spawn(max_samples)
+	args = (initial_rays, systems, playground, tolerances, instrument)
+
+	def converged() -> bool:
+		return width is not None and result.samples >= min_samples \
+			and all(2 * h <= width for h in result.interval.values())
+
+	if processes == 1:
+		for s in seeds:
+			result.add(sample(*args, s, kwargs))
+			if converged():
+				break
+	else:
+		processes = processes or os.cpu_count()
+		chunk = 2 * processes									# Samples in flight
+		with ProcessPoolExecutor(processes) as pool:
+			for start in range(0, max_samples, chunk):
+				futures = [pool.submit(sample, *args, s, kwargs) for s in seeds[start:start + chunk]]
+				for f in futures:
+					if converged():
+						f.cancel()
+					else:
+						result.add(f.result())
+				if converged():
+					break
+				if print_status:
+					print(f"   {result.samples} samples, widest interval {2 * max(result.interval.values(), default=0):.3g}")
+
+	result.converged = converged()
+	if print_status:
+		print(f"✔ Tolerance analysis: {result.samples} samples{'' if result.converged else ', not converged'}.")
+	return result
@@ -0,0 +1,272 @@
+import numpy as np
+from matplotlib.pyplot import Axes, subplots
+from matplotlib.collections import LineCollection
+
+import raysim.photon as ph
+import raysim.source as src
+from raysim.systems import System
+
+
+def ray_colors(rays: list[ph.Photon]) -> np.ndarray:
+	"""RGBA colors of rays, alpha is the intensity.
+
+	Parameters:
+	-----------
+	rays: list
+		list of rays
+
+	Returns:
+	--------
+	np.ndarray, colors, shape (n, 4)
+	"""
+	colors = np.zeros((len(rays), 4))
+	for i, p in enumerate(rays):
+		colors[i, :3] = np.array(p.color) / 255
+		colors[i, 3] = np.clip(np.sum(p.intensity), 0, 1)
+	return colors
+
+
+def rasterize(rays: list[ph.Photon], playground: tuple, resolution: int | tuple[int] = 512, chunk: int = 1 << 20) -> np.ndarray:
+	"""Accumulate rays into an irradiance map.
+	Segments are sampled at least twice per pixel, each sample deposits its length times
+	the ray intensity and color, so pixels hold the fluence per unit area.
+	Samples are processed by chunks: memory is bounded by the image and chunk sizes.
+
+	Parameters:
+	-----------
+	rays: list
+		list of rays
+	playground: tuple
+		playground limits
+	resolution: int or tuple, optional (default = 512)
+		image width, or (width, height) - the height follows the playground aspect if omitted
+	chunk: int, optional (default = 2^20)
+		maximum number of samples processed at once
+
+	Returns:
+	--------
+	np.ndarray, irradiance map, shape (height, width, 3), origin at the bottom left
+	"""
+	x0, y0, x1, y1 = playground
+	if isinstance(resolution, int):
+		width, height = resolution, max(1, int(round(resolution * (y1 - y0) / (x1 - x0))))
+	else:
+		width, height = resolution
+	size = np.array([(x1 - x0) / width, (y1 - y0) / height])
+	step = np.min(size) / 2											# Sampling step
+
+	image = np.zeros((3, height * width))
+	starts, ends, weights = [], [], []
+	pending = 0
+
+	def flush():
+		"""Rasterize the pending segments."""
+		a = np.concatenate(starts)
+		b = np.concatenate(ends)
+		w = np.concatenate(weights)
+		length = np.sqrt(np.sum((b - a) ** 2, axis=1))
+		k = np.maximum(1, np.ceil(length / step)).astype(int)		# Samples per segment
+		index = np.repeat(np.arange(len(k)), k)
+		t = (np.arange(len(index)) - np.repeat(np.cumsum(k) - k, k) + .5) / k[index]
+		pts = a[index] + (b - a)[index] * t[:, None]
+		ij = np.floor((pts - (x0, y0)) / size).astype(int)
+		inside = (ij[:, 0] >= 0) & (ij[:, 0] < width) & (ij[:, 1] >= 0) & (ij[:, 1] < height)
+		pixel = ij[inside, 1] * width + ij[inside, 0]
+		deposit = (length / k)[index][inside]
+		for c in range(3):
+			image[c] += np.bincount(pixel, weights=deposit * w[index][inside, c], minlength=height * width)
+		starts.clear()
+		ends.clear()
+		weights.clear()
+
+	for p in rays:
+		positions = np.asarray(p.positions, dtype=float)[:, :2]
+		if len(positions) < 2:
+			continue
+		starts.append(positions[:-1])
+		ends.append(positions[1:])
+		weights.append(np.tile(np.array(p.color) / 255 * np.sum(p.intensity), (len(positions) - 1, 1)))
+		pending += int(np.sum(np.sqrt(np.sum(np.diff(positions, axis=0) ** 2, axis=1))) / step) + len(positions)
+		if pending >= chunk:
+			flush()
+			pending = 0
+	if starts:
+		flush()
+
+	return (image / np.prod(size)).T.reshape(height, width, 3)
+
+
+def display_density(rays: list[ph.Photon], systems: list[System], playground: tuple, resolution: int | tuple[int] = 512,
+	log: bool = False, ax: Axes = None, title: str = None) -> None:
+	"""Display the simulation as an irradiance map.
+	A single image is drawn whatever the number of rays.
+
+	Parameters:
+	-----------
+	rays: list
+		list of rays
+	systems: list
+		list of systems
+	playground: tuple
+		playground limits
+	resolution: int or tuple, optional (default = 512)
+		image width, or (width, height)
+	log: bool, optional (default = False)
+		logarithmic brightness scale
+	ax: matplotlib.pyplot.Axes object, optional (default = subplots()[1])
+		axis
+	title: str, optional (default = None)
+		axis title
+	"""
+	if ax == None:
+		fig, ax = subplots(num=title)					# Create figure and axis
+
+	image = rasterize(rays, playground, resolution)
+	brightness = np.max(image, axis=2, keepdims=True)
+	if log:
+		scaled = np.log1p(brightness / max(np.min(brightness[brightness > 0], initial=1), 1e-12))
+	else:
+		scaled = brightness
+	scaled = scaled / max(np.max(scaled), 1e-12)
+	image = np.divide(image, brightness, out=np.zeros_like(image), where=brightness > 0) * scaled	# Hue times brightness
+
+	ax.clear()											# Clear axis
+	ax.imshow(image, origin='lower', extent=(playground[0], playground[2], playground[1], playground[3]),
+		interpolation='nearest')
+
+	for s in systems:									# Plot systems
+		outline = s.outline()
+		ax.plot(outline[:,0], outline[:,1], color = s.color, linestyle = s.style)
+
+	ax.set_xlim(playground[0], playground[2])			# Set x limits
+	ax.set_ylim(playground[1], playground[3])			# Set y limits
+	ax.set_title(title)									# Set title
+
+
+class SceneView:
+	"""Persistent scene view.
+	Artists are created once and only updated: rays are a single animated collection
+	redrawn by blitting over a cached background. Systems are part of the background until
+	they move, they are then animated and blitted with the rays. The whole figure is only
+	redrawn when systems are added or removed, when a system first moves and when the limits change.
+
+	Attributes:
+	-----------
+	playground: tuple
+		playground limits
+	ax: matplotlib.pyplot.Axes
+		axis
+	rays: matplotlib.collections.LineCollection
+		rays artist
+	systems: list
+		systems artists
+
+	Methods:
+	--------
+	update(rays, systems=None)
+		Update the displayed scene.
+	"""
+
+	def __init__(self, playground: tuple, ax: Axes = None, sources: list[src.Source] | tuple[float] = None, title: str = None):
+		"""Initialize a scene view.
+
+		Parameters:
+		-----------
+		playground: tuple
+			playground limits
+		ax: matplotlib.pyplot.Axes, optional (default = subplots()[1])
+			axis
+		sources: list or tuple, optional (default = None)
+			sources positions
+		title: str, optional (default = None)
+			axis title
+		"""
+		if ax == None:
+			fig, ax = subplots(num=title)				# Create figure and axis
+		self.playground = playground
+		self.ax = ax
+		self.canvas = ax.figure.canvas
+
+		self.rays = LineCollection([], animated=True)	# Rays layer, blitted
+		ax.add_collection(self.rays)
+		self.systems = []
+		self._states = []								# Drawn systems states
+		self._background = None
+		self._limits = None								# Limits of the background
+		self._dirty = True								# Background must be redrawn
+
+		if sources != None and isinstance(sources, list):
+			sources_pos = np.array([s.position for s in sources])
+			ax.plot(sources_pos[:,0], sources_pos[:,1], '*', color = 'black')	# Plot sources
+		elif sources != None and isinstance(sources, tuple):
+			ax.plot(sources[0], sources[1], '*', color = 'black')
+
+		ax.axis('equal')								# Equal aspect ratio
+		ax.grid()										# Grid on
+		ax.set_xlim(playground[0], playground[2])		# Set x limits
+		ax.set_ylim(playground[1], playground[3])		# Set y limits
+		ax.set_xticks(np.arange(playground[0], playground[2]+1, 5))	# Set x ticks
+		ax.set_yticks(np.arange(playground[1], playground[3]+1, 5))	# Set y ticks
+		ax.set_title(title)								# Set title
+
+		self._cid = self.canvas.mpl_connect('draw_event', self._on_draw)
+
+	def update(self, rays: list[ph.Photon], systems: list[System] = None):
+		"""Update the displayed scene.
+
+		Parameters:
+		-----------
+		rays: list
+			list of rays
+		systems: list, optional (default = None)
+			list of systems, unchanged if None
+		"""
+		self.rays.set_segments([np.asarray(p.positions)[:, :2] for p in rays])
+		self.rays.set_color(ray_colors(rays))
+		if systems is not None:
+			self._update_systems(systems)
+
+		if self._dirty or self._background is None or self._limits != self._view_limits() or not self.canvas.supports_blit:
+			self._dirty = False
+			self.canvas.draw_idle()						# Full redraw, background captured on draw
+		else:
+			self.canvas.restore_region(self._background)
+			self._draw_animated()
+			self.canvas.blit(self.ax.bbox)
+
+	def _view_limits(self) -> tuple:
+		"""Axis limits and position, the background is only valid for them."""
+		return (self.ax.get_xlim(), self.ax.get_ylim(), tuple(self.ax.bbox.bounds))
+
+	def _draw_animated(self):
+		"""Draw the moving systems and the rays."""
+		for artist in self.systems:
+			if artist.get_animated():
+				self.ax.draw_artist(artist)
+		self.ax.draw_artist(self.rays)
+
+	def _update_systems(self, systems: list[System]):
+		"""Update the artists of the systems that have moved."""
+		if len(systems) != len(self.systems):
+			for artist in self.systems:
+				artist.remove()
+			self.systems = [self.ax.plot([], [])[0] for s in systems]
+			self._states = [None] * len(systems)
+			self._dirty = True
+		for i, s in enumerate(systems):
+			state = (tuple(np.ravel(s.pos)), s.rot, s.height, s.color, s.style)
+			if state != self._states[i]:
+				outline = s.outline()
+				self.systems[i].set_data(outline[:,0], outline[:,1])
+				self.systems[i].set_color(s.color)
+				self.systems[i].set_linestyle(s.style)
+				if self._states[i] is not None and not self.systems[i].get_animated():
+					self.systems[i].set_animated(True)		# Moving system, removed from the background once
+					self._dirty = True
+				self._states[i] = state
+
+	def _on_draw(self, event):
+		"""Capture the static background and draw the moving systems and the rays over it."""
+		self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+		self._limits = self._view_limits()
+		self._draw_animated()
@@ -0,0 +1,28 @@
+import os
+
+from raysim import simulate
+from raysim.budget import Budget
+from raysim.scene import Scene
+from raysim.photon import Photon
+
+quiet = dict(print_status=False, print_measures=False, print_stats=False)
+michelson = os.path.join(os.path.dirname(__file__), '..', 'examples', 'scenes', 'michelson.json')
+
+def test_limits_are_inclusive():
+	scene = Scene.from_file(michelson)
+	scene.budget = Budget()
+	rays = scene.simulate(**quiet)
+	used, measures = dict(scene.budget.used), dict(scene.systems[-1].measures)
+	for limit in ('steps', 'rays', 'live_rays'):
+		scene.budget = Budget(**{limit: used[limit]})
+		assert len(scene.simulate(**quiet)) == len(rays)
+		assert scene.budget.exhausted == []
+		assert scene.systems[-1].measures == measures
+	scene.budget = Budget(rays=len(rays) - 1)
+	scene.simulate(**quiet)
+	assert scene.budget.exhausted == ['rays']
+
+def test_single_ray_budget():
+	for budget in (Budget(rays=1), Budget(live_rays=1)):
+		rays = simulate([Photon((0, 0))], [], (-1, -1, 1, 1), budget=budget, **quiet)
+		assert len(rays[0].positions) > 1 and budget.exhausted == []
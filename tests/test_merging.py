@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from raysim import simulate
+from raysim.photon import Photon
+from raysim.systems import Mirror, Detector
+
+playground = (-20, -10, 15, 10)
+
+def michelson(arm: float):
+	"""Aligned Michelson interferometer, both arms recombine on the splitter towards the detector."""
+	rays = [Photon((-10, 0), dir=0)]
+	systems = [
+		Mirror((0, 0), 10, rot=3*np.pi/4, reflexion=.5),
+		Mirror((arm, 0), 10, rot=0),
+		Mirror((0, 5), 10, rot=np.pi/2),
+		Detector((0, -7), 10, rot=np.pi/2)
+	]
+	return rays, systems
+
+def run(arm: float, **options):
+	rays, systems = michelson(arm)
+	rays = simulate(rays, systems, playground, max_rays=20, print_status=False, print_measures=False,
+		print_stats=False, **options)
+	return rays, systems[-1].measures
+
+@pytest.mark.parametrize('options, tolerance', [({}, .15), ({'engine': 'event'}, 1e-6)], ids=['step', 'event'])
+@pytest.mark.parametrize('arm', [7, 7.3])
+def test_recombined_beam_merges(options, tolerance, arm):
+	rays, measures = run(arm, **options)
+	merged, merged_measures = run(arm, merge=tolerance, **options)
+	assert len(merged) == len(rays) - 2						# Towards the detector and back to the source
+	assert sum(r.components is not None for r in merged) == 2
+	assert merged_measures.keys() == measures.keys()
+	assert all(np.isclose(merged_measures[w], measures[w]) for w in measures)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from raysim import simulate
+from raysim.systems import Mirror, Spectrometer
+from raysim.photon import Photon
+import raysim.geometry as geo
+
+playground = (-10, -10, 10, 10)
+tilt = .3												# Cavity axis, not aligned with the grid
+axis = np.array([np.cos(tilt), np.sin(tilt)])
+side = np.array([-np.sin(tilt), np.cos(tilt)])
+
+def cavity():
+	"""Tilted cavity: rays bounce between two mirrors, the output coupler leaks into a spectrometer."""
+	rays = [Photon(tuple(-3*axis + y*side), dir=tilt) for y in np.linspace(-2, 2, 50)]
+	systems = [
+		Mirror(tuple(-4*axis), 6, rot=tilt),
+		Mirror(tuple(4*axis), 6, rot=tilt + np.pi, reflexion=.8),
+		Spectrometer(tuple(8*axis), 10, rot=tilt + np.pi)
+	]
+	return rays, systems
+
+def run(precision, **options):
+	rays, systems = cavity()
+	rays = simulate(rays, systems, playground, max_rays=1000, print_status=False, print_measures=False,
+		print_stats=False, precision=precision, **options)
+	return rays, sum(systems[2].measures.values()), sum(r.optical_path for r in rays)
+
+@pytest.mark.parametrize('options', [{'adaptive': True}, {'engine': 'event'}, {'sequence': 'auto'}],
+	ids=['step', 'event', 'sequential'])
+def test_single_precision_agrees(options):
+	_, total, path = run('double', **options)
+	rays, single_total, single_path = run('single', **options)
+	assert total > 0
+	assert abs(single_total - total) / total <= 1e-3
+	assert abs(single_path - path) / path <= 1e-3			# Sensitive to the rounded vertices
+	assert all(np.asarray(r.positions).dtype == np.float32 for r in rays)
+
+def test_precision_is_local():
+	run('single', engine='event')
+	assert geo.get_dtype() == np.float64
+	assert geo.get_epsilon() == 1e3 * np.finfo(np.float64).eps
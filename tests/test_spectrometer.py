@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from raysim.systems import Spectrometer
+
+@pytest.mark.parametrize('resolution, bins', [(7, 58), (10, 40), (.1, 4000), (1000, 1)])
+def test_resolution_covers_the_range(resolution, bins):
+	spectrometer = Spectrometer((0, 0), 1, resolution=resolution, wavelength_range=(380, 780))
+	assert len(spectrometer.edges) == bins + 1
+	assert spectrometer.edges[0] == 380 and spectrometer.edges[-1] == 780
+	assert np.all(np.diff(spectrometer.edges) <= resolution + 1e-9)
+
+def test_upper_edge_is_measured():
+	spectrometer = Spectrometer((0, 0), 1, resolution=7)
+	spectrometer.accumulate(np.array([380., 779.5, 780.]), np.ones(3))
+	assert spectrometer.outside == 0
+	assert sum(spectrometer.measures.values()) == 3